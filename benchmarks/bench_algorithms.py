@@ -0,0 +1,65 @@
+"""Per-request verification cost of each supported signature algorithm.
+
+    python benchmarks/bench_algorithms.py --output algorithms.json
+"""
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from common import get_parser, measure, write_results
+from mumichaspy.fastapi_jwt_chassis.config import Verifier
+from mumichaspy.fastapi_jwt_chassis.time import current_timestamp
+
+ISSUER = "benchmark"
+HMAC_SECRET = "benchmark-shared-secret-of-32-bytes!"
+
+
+def public_pem(private_key) -> str:
+    """Get the PEM public key of a private key."""
+    return (
+        private_key.public_key()
+        .public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        .decode()
+    )
+
+
+def get_signing_keys() -> list:
+    """Return (algorithm, signing key, verification key) for every benchmarked algorithm."""
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    return [
+        ("RS256", rsa_key, public_pem(rsa_key)),
+        ("ES256", ec_key, public_pem(ec_key)),
+        ("EdDSA", ed_key, public_pem(ed_key)),
+        ("HS256", HMAC_SECRET, HMAC_SECRET),
+    ]
+
+
+def main():
+    parser = get_parser(__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Verifications per round")
+    args = parser.parse_args()
+
+    payload = {
+        "sub": "1",
+        "iss": ISSUER,
+        "roles": ["USER"],
+        "iat": current_timestamp(),
+        "exp": current_timestamp() + 3600,
+    }
+    results = []
+    for algorithm, signing_key, verification_key in get_signing_keys():
+        encoded_token = jwt.encode(payload, signing_key, algorithm=algorithm)
+        verifier = Verifier(ISSUER, verification_key, algorithm)
+        timings = measure(
+            lambda: verifier.verify(encoded_token), number=args.number, repeat=args.repeat
+        )
+        results.append({"algorithm": algorithm, "token_size": len(encoded_token), **timings})
+
+    write_results("algorithms", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Cost of bulk CRUD helpers compared with their per-row counterparts.
+
+    python benchmarks/bench_crud.py --rows 1000 --output crud.json
+
+Every case runs against a fresh SQLite database (in a temporary file, so that commits
+have a realistic cost).
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from common import get_parser, summarize, write_results
+from mumichaspy.sqlalchemy_chassis.crud import (
+    create_element,
+    create_elements,
+    delete_element_by_id,
+    delete_elements,
+    get_element_by_id,
+    update_elements,
+    upsert_elements,
+)
+
+Base = declarative_base()
+
+
+class Item(Base):  # pylint: disable=too-few-public-methods
+    """Benchmarked table."""
+
+    __tablename__ = "item"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+    value = Column(Integer)
+
+
+def get_rows(number: int) -> list:
+    """Get rows to insert."""
+    return [{"name": f"Item {i}", "value": i} for i in range(number)]
+
+
+async def create_per_row(db, rows):
+    for row in rows:
+        await create_element(db, Item(**row))
+
+
+async def create_bulk(db, rows):
+    await create_elements(db, Item, rows)
+
+
+async def create_bulk_returning_ids(db, rows):
+    await create_elements(db, Item, rows, return_ids=True)
+
+
+async def update_per_row(db, rows):
+    for i, row in enumerate(rows, start=1):
+        element = await get_element_by_id(db, Item, i)
+        element.value = -row["value"]
+        await db.commit()
+
+
+async def update_bulk(db, rows):
+    await update_elements(db, Item, {}, {"value": -1})
+
+
+async def upsert_bulk(db, rows):
+    # Half of the rows exist (updated) and half are new (inserted)
+    offset = len(rows) // 2
+    upserts = [{"id": i + offset, **row} for i, row in enumerate(rows, start=1)]
+    await upsert_elements(db, Item, upserts)
+
+
+async def delete_per_row(db, rows):
+    for i in range(1, len(rows) + 1):
+        await delete_element_by_id(db, Item, i)
+
+
+async def delete_per_row_not_materialized(db, rows):
+    for i in range(1, len(rows) + 1):
+        await delete_element_by_id(db, Item, i, materialize=False)
+
+
+async def delete_bulk(db, rows):
+    await delete_elements(db, Item, ids=list(range(1, len(rows) + 1)))
+
+
+async def run_case(case, rows: list, repeat: int, populate: bool = False) -> dict:
+    """Run a case repeat times, each one against a fresh database, and time it.
+
+    With populate, the rows are inserted (untimed) before running the case.
+    """
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            database_url = f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}"
+            engine = create_async_engine(database_url)
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            session_local = sessionmaker(bind=engine, class_=AsyncSession)
+            async with session_local() as db:
+                if populate:
+                    await create_elements(db, Item, rows)
+                start = time.perf_counter()
+                await case(db, rows)
+                timings.append(time.perf_counter() - start)
+            await engine.dispose()
+    return summarize(timings, len(rows))
+
+
+def main():
+    parser = get_parser(__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per round")
+    args = parser.parse_args()
+
+    rows = get_rows(args.rows)
+    cases = [
+        ("create_element", create_per_row, False),
+        ("create_elements", create_bulk, False),
+        ("create_elements_return_ids", create_bulk_returning_ids, False),
+        ("update_per_row", update_per_row, True),
+        ("update_elements", update_bulk, True),
+        ("upsert_elements", upsert_bulk, True),
+        ("delete_element_by_id", delete_per_row, True),
+        ("delete_element_by_id_not_materialized", delete_per_row_not_materialized, True),
+        ("delete_elements", delete_bulk, True),
+    ]
+    results = []
+    for name, case, populate in cases:
+        timings = asyncio.run(run_case(case, rows, args.repeat, populate))
+        results.append({"case": name, "rows": args.rows, **timings})
+
+    write_results("crud", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Import-time (cold start) benchmark.
+
+Each module is imported in a fresh interpreter, so results include the cost of any work
+done at import time.
+
+    python benchmarks/bench_import.py --output import.json
+"""
+
+import subprocess
+import sys
+
+from common import get_parser, summarize, write_results
+
+MODULES = [
+    "mumichaspy.fastapi_jwt_chassis.config",
+    "mumichaspy.fastapi_jwt_chassis.validation",
+    "mumichaspy.fastapi_jwt_chassis.mocks",
+    "mumichaspy.sqlalchemy_chassis.database",
+    "mumichaspy.sqlalchemy_chassis.crud",
+]
+
+CODE = "import time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)"
+
+
+def import_time(module: str) -> float:
+    """Seconds needed to import module in a new interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", CODE.format(module)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    args = get_parser(__doc__.splitlines()[0]).parse_args()
+    results = []
+    for module in MODULES:
+        timings = [import_time(module) for _ in range(args.repeat)]
+        results.append({"module": module, **summarize(timings, 1)})
+    write_results("import", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
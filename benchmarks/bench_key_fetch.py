@@ -0,0 +1,61 @@
+"""Cost of fetching public keys and JWKS from an issuer stand-in served on localhost.
+
+    python benchmarks/bench_key_fetch.py --latency 0.01 --output key_fetch.json
+
+Measures the PEM public key fetch (sync and async), full JWKS refreshes and conditional
+(ETag, 304) refreshes with the given issuer latency.
+"""
+
+import asyncio
+
+from common import get_parser, measure, write_results
+from mumichaspy.fastapi_jwt_chassis.config import (
+    get_public_key_from_url,
+    get_public_key_from_url_async,
+)
+from mumichaspy.fastapi_jwt_chassis.jwks import KeyStore
+from mumichaspy.fastapi_jwt_chassis.testing_issuer import (
+    JWKS_PATH,
+    PUBLIC_KEY_PATH,
+    IssuerStandIn,
+)
+
+
+def main():
+    parser = get_parser(__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50, help="Fetches per round")
+    parser.add_argument("--latency", type=float, default=0.0, help="Issuer latency (s)")
+    parser.add_argument("--keys", type=int, default=3, help="Keys published in the JWKS")
+    args = parser.parse_args()
+
+    results = []
+    with IssuerStandIn(latency=args.latency) as issuer:
+        for _ in range(args.keys - 1):
+            issuer.rotate_key()
+        public_key_url = issuer.url + PUBLIC_KEY_PATH
+        jwks_url = issuer.url + JWKS_PATH
+
+        def full_refresh():
+            KeyStore(jwks_url).refresh()
+
+        key_store = KeyStore(jwks_url)
+        key_store.refresh()
+
+        cases = [
+            ("public_key", lambda: get_public_key_from_url(public_key_url)),
+            (
+                "public_key_async",
+                lambda: asyncio.run(get_public_key_from_url_async(public_key_url)),
+            ),
+            ("jwks_refresh", full_refresh),
+            ("jwks_refresh_not_modified", key_store.refresh),
+        ]
+        for name, func in cases:
+            timings = measure(func, number=args.number, repeat=args.repeat)
+            results.append({"case": name, "latency": args.latency, "keys": args.keys, **timings})
+
+    write_results("key_fetch", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
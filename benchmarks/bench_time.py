@@ -0,0 +1,60 @@
+"""Micro-benchmarks of fastapi_jwt_chassis.time helpers.
+
+Legacy entries reproduce the previous implementation (a pytz timezone and an aware
+datetime per call) as a reference.
+
+    python benchmarks/bench_time.py --output time.json
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+from common import get_parser, measure, write_results
+from mumichaspy.fastapi_jwt_chassis import time as chassis_time
+
+
+def legacy_current_timestamp() -> int:
+    return int(datetime.now(timezone(chassis_time.default_timezone_str)).timestamp())
+
+
+def legacy_current_timestamp_with_timedelta(seconds: float) -> int:
+    now = datetime.now(timezone(chassis_time.default_timezone_str))
+    return int((now + timedelta(seconds=seconds)).timestamp())
+
+
+def main():
+    parser = get_parser(__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000, help="Calls per round")
+    args = parser.parse_args()
+
+    delta = chassis_time.DEFAULT_TIMEDELTA
+    benchmarks = [
+        ("legacy_current_timestamp", legacy_current_timestamp),
+        ("current_timestamp", chassis_time.current_timestamp),
+        (
+            "legacy_current_timestamp_with_timedelta",
+            lambda: legacy_current_timestamp_with_timedelta(delta),
+        ),
+        (
+            "current_timestamp_with_timedelta",
+            lambda: chassis_time.current_timestamp_with_timedelta(seconds=delta),
+        ),
+        ("current_datetime[pytz]", chassis_time.current_datetime),
+        ("datetime_from_timestamp[pytz]", lambda: chassis_time.datetime_from_timestamp(0)),
+    ]
+    if sys.version_info >= (3, 9):
+        zoneinfo_timezone = chassis_time.get_timezone(backend="zoneinfo")
+        benchmarks.append(
+            ("current_datetime[zoneinfo]", lambda: datetime.now(zoneinfo_timezone))
+        )
+
+    results = []
+    for name, func in benchmarks:
+        results.append({"function": name, **measure(func, args.number, args.repeat)})
+    write_results("time", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
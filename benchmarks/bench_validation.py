@@ -0,0 +1,148 @@
+"""Throughput of token verification, alone and through JWTBearer requests.
+
+    python benchmarks/bench_validation.py --output validation.json
+
+Measures validate_and_decode_token and full requests to a FastAPI app protected by
+JWTBearer (through an in-process ASGI client), for several keys and algorithms, token
+cache configurations and concurrency levels.
+"""
+
+import asyncio
+import time
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi import Depends, FastAPI
+
+from common import get_parser, measure, summarize, write_results
+from mumichaspy.fastapi_jwt_chassis.cache import TokenCache
+from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.mocks import (
+    DECODED_MOCK_JWT,
+    TESTING_PRIVATE_KEY,
+    TESTING_PUBLIC_KEY,
+    get_encoded_mock_jwt,
+)
+from mumichaspy.fastapi_jwt_chassis.signing import TokenSigner
+from mumichaspy.fastapi_jwt_chassis.validation import jwt_bearer, validate_and_decode_token
+
+CACHE_SIZES = {"none": 0, "token": 1024}
+
+
+def public_pem(private_key) -> str:
+    """Get the PEM public key of a private key."""
+    return (
+        private_key.public_key()
+        .public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        .decode()
+    )
+
+
+def get_keys() -> list:
+    """Return (name, algorithm, signing key, public key) for every benchmarked key."""
+    keys = [("RS256-1024", "RS256", TESTING_PRIVATE_KEY, TESTING_PUBLIC_KEY)]
+    for key_size in (2048, 4096):
+        rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+        keys.append((f"RS256-{key_size}", "RS256", rsa_key, public_pem(rsa_key)))
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    keys.append(("ES256", "ES256", ec_key, public_pem(ec_key)))
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    keys.append(("EdDSA", "EdDSA", ed_key, public_pem(ed_key)))
+    return keys
+
+
+def get_token(algorithm: str, private_key) -> str:
+    """Mint a token (with the mocks helper for the testing key)."""
+    payload = {**DECODED_MOCK_JWT, "sub": str(DECODED_MOCK_JWT["sub"])}
+    if private_key is TESTING_PRIVATE_KEY:
+        return get_encoded_mock_jwt(payload)
+    return TokenSigner(private_key, algorithm=algorithm).sign(payload, lifetime=3600)
+
+
+def configure(public_key: str, algorithm: str, cache_size: int):
+    """Point the global config to the benchmarked key and token cache."""
+    config.public_key = public_key
+    config.jwt_algorithm = algorithm
+    config.token_cache = TokenCache(maxsize=cache_size, ttl=300)
+
+
+def get_app() -> FastAPI:
+    """Get an app with a single route protected by JWTBearer."""
+    app = FastAPI()
+
+    @app.get("/")
+    def protected(decoded_jwt: dict = Depends(jwt_bearer)):
+        return {"sub": decoded_jwt["sub"]}
+
+    return app
+
+
+async def measure_requests(app, encoded_token: str, concurrency: int, number: int, repeat: int):
+    """Send number requests per round, concurrency at a time, and return per-request timings."""
+    headers = {"Authorization": f"Bearer {encoded_token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def worker(count: int):
+            for _ in range(count):
+                response = await client.get("/", headers=headers)
+                response.raise_for_status()
+
+        number = number // concurrency * concurrency
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(number // concurrency) for _ in range(concurrency)))
+            timings.append(time.perf_counter() - start)
+
+    results = summarize(timings, number)
+    results["requests_per_second"] = 1e6 / results["median_us"]
+    return results
+
+
+def main():
+    parser = get_parser(__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=1000, help="Verifications per round")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per round")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Concurrent clients"
+    )
+    args = parser.parse_args()
+
+    app = get_app()
+    results = []
+    for name, algorithm, private_key, public_key in get_keys():
+        encoded_token = get_token(algorithm, private_key)
+        for cache, cache_size in CACHE_SIZES.items():
+            configure(public_key, algorithm, cache_size)
+            timings = measure(
+                lambda: validate_and_decode_token(encoded_token, config.public_key_object),
+                number=args.number,
+                repeat=args.repeat,
+            )
+            results.append(
+                {"target": "validate_and_decode_token", "key": name, "cache": cache, **timings}
+            )
+
+            for concurrency in args.concurrency:
+                timings = asyncio.run(
+                    measure_requests(
+                        app, encoded_token, concurrency, args.requests, args.repeat
+                    )
+                )
+                results.append(
+                    {
+                        "target": "JWTBearer",
+                        "key": name,
+                        "cache": cache,
+                        "concurrency": concurrency,
+                        **timings,
+                    }
+                )
+
+    write_results("validation", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
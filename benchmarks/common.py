@@ -0,0 +1,69 @@
+"""Helpers shared by benchmark scripts.
+
+Every benchmark prints (or writes with --output) a JSON document so that results can be
+compared between releases.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import time
+
+
+def get_parser(description: str) -> argparse.ArgumentParser:
+    """Get an argument parser with the options shared by all benchmarks."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", help="JSON file to write results to (stdout if omitted)")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per measurement")
+    return parser
+
+
+def summarize(timings: list, number: int) -> dict:
+    """Summarize per-round timings (seconds) as per-call microseconds."""
+    per_call = [timing / number * 1e6 for timing in timings]
+    return {
+        "number": number,
+        "repeat": len(timings),
+        "min_us": min(per_call),
+        "median_us": statistics.median(per_call),
+        "max_us": max(per_call),
+    }
+
+
+def measure(func, number: int = 1000, repeat: int = 5) -> dict:
+    """Call func number times per round and return per-call timings."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, number)
+
+
+def get_version() -> str:
+    """Get installed mumichaspy version."""
+    try:
+        from importlib.metadata import version
+
+        return version("mumichaspy")
+    except Exception:
+        return "unknown"
+
+
+def write_results(benchmark: str, results: list, output: str = None):
+    """Print or write benchmark results as JSON."""
+    document = {
+        "benchmark": benchmark,
+        "mumichaspy": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if output is None:
+        print(text)
+    else:
+        with open(output, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,85 @@
+"""Bounded caches for already verified JWTs."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from mumichaspy.fastapi_jwt_chassis.time import coarse_clock
+
+
+def token_digest(encoded_token: str) -> bytes:
+    """Return the digest used to index an encoded token."""
+    return hashlib.sha256(encoded_token.encode()).digest()
+
+
+class TokenCache:
+    """LRU cache of decoded tokens whose TTL is capped at each token's exp claim.
+
+    Entries expire one clock tick before exp, since a coarse clock may lag behind by
+    that much.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, clock=coarse_clock):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, encoded_token: str, context=None):
+        """Return a copy of the cached claims for the token, or None.
+
+        An entry only matches if it was stored with the same context (key, issuer and
+        algorithms used for verification).
+        """
+        key = token_digest(encoded_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at, entry_context = entry
+                if expires_at > self.clock() and entry_context == context:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(claims)
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, encoded_token: str, claims: dict, context=None):
+        """Store the claims of a verified token."""
+        expires_at = self.clock() + self.ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp - getattr(self.clock, "tick", 0))
+
+        key = token_digest(encoded_token)
+        with self._lock:
+            self._entries[key] = (dict(claims), expires_at, context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry (e.g. after a public key rotation)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
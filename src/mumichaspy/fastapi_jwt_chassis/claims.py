@@ -0,0 +1,85 @@
+"""Lightweight object for the claims of a decoded JWT."""
+
+
+class Claims:
+    """Claims of a decoded JWT, with the standard ones parsed once.
+
+    roles is a frozenset. Other claims are kept in extra. Claims can also be read with
+    claims["name"] and claims.get("name"), like the decoded JWT dict.
+    """
+
+    __slots__ = ("sub", "iss", "exp", "iat", "email", "roles", "extra")
+
+    FIELDS = ("sub", "iss", "exp", "iat", "email", "roles")
+
+    def __init__(
+        self,
+        sub=None,
+        iss: str = None,
+        exp: int = None,
+        iat: int = None,
+        email: str = None,
+        roles=(),
+        extra: dict = None,
+    ):
+        self.sub = sub
+        self.iss = iss
+        self.exp = exp
+        self.iat = iat
+        self.email = email
+        # A single role may come as a string, which is not a collection of roles
+        self.roles = frozenset((roles,) if isinstance(roles, str) else roles or ())
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, decoded_jwt: dict) -> "Claims":
+        """Build claims from a decoded JWT dict."""
+        extra = {key: value for key, value in decoded_jwt.items() if key not in cls.FIELDS}
+        return cls(
+            sub=decoded_jwt.get("sub"),
+            iss=decoded_jwt.get("iss"),
+            exp=decoded_jwt.get("exp"),
+            iat=decoded_jwt.get("iat"),
+            email=decoded_jwt.get("email"),
+            roles=decoded_jwt.get("roles"),
+            extra=extra,
+        )
+
+    def has_role(self, role: str) -> bool:
+        """Whether the JWT has the given role."""
+        return role in self.roles
+
+    def to_dict(self) -> dict:
+        """Return the claims as a dict (roles as a list), like the decoded JWT."""
+        decoded_jwt = {
+            field: getattr(self, field)
+            for field in self.FIELDS
+            if field != "roles" and getattr(self, field) is not None
+        }
+        decoded_jwt["roles"] = sorted(self.roles)
+        decoded_jwt.update(self.extra)
+        return decoded_jwt
+
+    def get(self, key: str, default=None):
+        """Return a claim, or default if it is not set."""
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key: str):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Claims):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"Claims(sub={self.sub!r}, iss={self.iss!r}, roles={sorted(self.roles)!r})"
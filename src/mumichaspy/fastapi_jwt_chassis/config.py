@@ -1,11 +1,30 @@
 import os
 import logging
+from contextlib import asynccontextmanager
+from mumichaspy.fastapi_jwt_chassis.cache import TokenCache
+from mumichaspy.fastapi_jwt_chassis.jwks import KeyStore
+from mumichaspy.fastapi_jwt_chassis.key_file import (
+    KeyFileLock,
+    get_key_file_mtime,
+    read_fresh_key_file,
+    write_key_file,
+)
+from mumichaspy.fastapi_jwt_chassis.metrics import MetricsSink, PrometheusMetricsSink
+from mumichaspy.fastapi_jwt_chassis.time import coarse_clock
 
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 5.0
+VERIFICATION_MODES = ("inline", "thread", "process")
 
-def get_public_key_from_url(public_key_url: str):
+
+def get_public_key_from_url(
+    public_key_url: str,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+):
     """Upload public key from URL."""
 
     import httpx
@@ -17,7 +36,8 @@ def get_public_key_from_url(public_key_url: str):
         return None
 
     try:
-        with httpx.Client() as client:
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        with httpx.Client(timeout=timeout) as client:
             response = client.get(public_key_url)
 
             if response.status_code != 200:
@@ -31,6 +51,42 @@ def get_public_key_from_url(public_key_url: str):
     return public_key
 
 
+async def get_public_key_from_url_async(
+    public_key_url: str,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    retries: int = 3,
+):
+    """Upload public key from URL without blocking the event loop, retrying on failure."""
+
+    import asyncio
+    import httpx
+
+    if public_key_url is None or public_key_url == "":
+        logger.warning("No public key URL provided")
+        return None
+
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        for attempt in range(retries + 1):
+            try:
+                response = await client.get(public_key_url)
+
+                if response.status_code != 200:
+                    raise Exception(f"Status code: {response.status_code}")
+
+                return response.text
+
+            except Exception as e:
+                logger.warning(
+                    f"Could not load public key from URL (attempt {attempt + 1}): {e}"
+                )
+                if attempt < retries:
+                    await asyncio.sleep(0.5 * 2**attempt)
+
+    return None
+
+
 def get_public_key_from_file(file_path: str):
     """Get public key from pem file."""
     public_key = None
@@ -48,14 +104,44 @@ def get_public_key_from_file(file_path: str):
 
 
 def write_public_key_to_file(public_key: str, file_path: str):
-    """Write public key to file."""
+    """Write public key to file (atomically, and only if it changed)."""
     try:
-        with open(file_path, "w") as f:
-            f.write(public_key)
+        write_key_file(public_key, file_path)
     except Exception as e:
         logger.warning("Could not write public key to file: " + str(e))
 
 
+def load_public_key(public_key: str, algorithm: str):
+    """Parse a PEM public key into the key object used by the given algorithm."""
+    from jwt.algorithms import get_default_algorithms
+
+    algorithms = get_default_algorithms()
+    if algorithm not in algorithms:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+    return algorithms[algorithm].prepare_key(public_key)
+
+
+class Verifier:
+    """Key and algorithm used to verify the tokens of one issuer.
+
+    The key is a shared secret for HMAC algorithms (HS256, HS384, HS512) and a PEM public
+    key otherwise (e.g. EdDSA for Ed25519 keys). It is parsed once, when created.
+    """
+
+    def __init__(self, issuer: str, key, algorithm: str):
+        self.issuer = issuer
+        self.algorithm = algorithm
+        self.algorithms = [algorithm]
+        self.key = load_public_key(key, algorithm)
+
+    def verify(self, encoded_token: str) -> dict:
+        """Decode the token if it validates (raises jwt exceptions otherwise)."""
+        import jwt
+
+        return jwt.decode(encoded_token, self.key, issuer=self.issuer, algorithms=self.algorithms)
+
+
 def get_public_key(
     public_key: str = None,
     public_key_url: str = None,
@@ -72,31 +158,360 @@ def get_public_key(
     return public_key
 
 
+async def get_public_key_async(
+    public_key: str = None,
+    public_key_url: str = None,
+    public_key_file_path: str = None,
+    **fetch_options,
+):
+    """Get public key without blocking the event loop."""
+
+    if public_key is None or public_key == "":
+        public_key = await get_public_key_from_url_async(public_key_url, **fetch_options)
+
+    if public_key is None or public_key == "":
+        public_key = get_public_key_from_file(public_key_file_path)
+
+    return public_key
+
+
+def get_shared_public_key(
+    public_key_url: str, public_key_file_path: str, max_age: float, algorithm: str
+):
+    """Get public key from the key file if younger than max_age, fetching it otherwise.
+
+    Fetches are serialized with a file lock, so when several workers start at once only
+    one of them fetches the key and the others read the file it writes.
+    """
+    public_key = read_fresh_key_file(public_key_file_path, max_age)
+    if public_key is not None:
+        return public_key
+
+    lock = KeyFileLock(public_key_file_path)
+    try:
+        lock.acquire()
+    except OSError as e:
+        logger.warning("Could not lock public key file: " + str(e))
+    try:
+        public_key = read_fresh_key_file(public_key_file_path, max_age)
+        if public_key is None:
+            public_key = get_public_key_from_url(public_key_url)
+            share_public_key(public_key, public_key_file_path, algorithm)
+    finally:
+        lock.release()
+
+    if public_key is None or public_key == "":
+        public_key = get_public_key_from_file(public_key_file_path)
+    return public_key
+
+
+async def get_shared_public_key_async(
+    public_key_url: str,
+    public_key_file_path: str,
+    max_age: float,
+    algorithm: str,
+    **fetch_options,
+):
+    """Get public key like get_shared_public_key, without blocking the event loop."""
+
+    import asyncio
+
+    public_key = read_fresh_key_file(public_key_file_path, max_age)
+    if public_key is not None:
+        return public_key
+
+    lock = KeyFileLock(public_key_file_path)
+    try:
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+            public_key = read_fresh_key_file(public_key_file_path, max_age)
+            if public_key is not None:
+                return public_key
+    except OSError as e:
+        logger.warning("Could not lock public key file: " + str(e))
+    try:
+        public_key = read_fresh_key_file(public_key_file_path, max_age)
+        if public_key is None:
+            public_key = await get_public_key_from_url_async(public_key_url, **fetch_options)
+            share_public_key(public_key, public_key_file_path, algorithm)
+    finally:
+        lock.release()
+
+    if public_key is None or public_key == "":
+        public_key = get_public_key_from_file(public_key_file_path)
+    return public_key
+
+
+def share_public_key(public_key: str, public_key_file_path: str, algorithm: str):
+    """Write a key fetched from the URL to the shared key file (marking it fresh), if valid."""
+    if public_key is None or public_key == "":
+        return
+    try:
+        load_public_key(public_key, algorithm)
+    except Exception as e:
+        logger.error("Invalid public key: " + str(e))
+        return
+    try:
+        write_key_file(public_key, public_key_file_path, refresh_mtime=True)
+    except Exception as e:
+        logger.warning("Could not write public key to file: " + str(e))
+
+
 class Config:
-    public_key = None
+    _public_key = None
+    _public_key_object = None
+    _public_key_loaded = False
+    _public_key_lock = None
+    _public_key_file_mtime = None
+    _public_key_file_checked_at = 0.0
     public_key_url = os.getenv("PUBLIC_KEY_URL", "")
     jwt_issuer = os.getenv("JWT_ISSUER", "mu-sse")
     jwt_algorithm = os.getenv("JWT_ALGORITHM", "RS256")
     public_key_file_path = os.getenv("PUBLIC_KEY_FILE_PATH", "public_key.pem")
+    public_key_file_max_age = float(os.getenv("PUBLIC_KEY_FILE_MAX_AGE", "0"))
+    jwt_cache_size = int(os.getenv("JWT_CACHE_SIZE", "0"))
+    jwt_cache_ttl = float(os.getenv("JWT_CACHE_TTL", "300"))
+    jwt_negative_cache_size = int(os.getenv("JWT_NEGATIVE_CACHE_SIZE", "0"))
+    jwt_negative_cache_ttl = float(os.getenv("JWT_NEGATIVE_CACHE_TTL", "10"))
+    jwt_log_rate_limit_interval = float(os.getenv("JWT_LOG_RATE_LIMIT_INTERVAL", "0"))
+    jwks_url = os.getenv("JWKS_URL", "")
+    jwks_refresh_interval = float(os.getenv("JWKS_REFRESH_INTERVAL", "3600"))
+    jwks_min_refetch_interval = float(os.getenv("JWKS_MIN_REFETCH_INTERVAL", "30"))
+    public_key_connect_timeout = float(
+        os.getenv("PUBLIC_KEY_CONNECT_TIMEOUT", str(DEFAULT_CONNECT_TIMEOUT))
+    )
+    public_key_read_timeout = float(
+        os.getenv("PUBLIC_KEY_READ_TIMEOUT", str(DEFAULT_READ_TIMEOUT))
+    )
+    public_key_retries = int(os.getenv("PUBLIC_KEY_RETRIES", "3"))
+    jwt_internal_issuer = os.getenv("JWT_INTERNAL_ISSUER", "")
+    jwt_internal_algorithm = os.getenv("JWT_INTERNAL_ALGORITHM", "HS256")
+    jwt_internal_key = os.getenv("JWT_INTERNAL_KEY", "")
+    jwt_verification_mode = os.getenv("JWT_VERIFICATION_MODE", "inline")
+    jwt_verification_workers = int(os.getenv("JWT_VERIFICATION_WORKERS", "4"))
+    jwt_inline_max_token_size = int(os.getenv("JWT_INLINE_MAX_TOKEN_SIZE", "0"))
+    jwt_metrics = os.getenv("JWT_METRICS", "")
 
     def __init__(self):
-        self.update_public_key()
+        if self.jwt_verification_mode not in VERIFICATION_MODES:
+            logger.error(
+                f"Unknown JWT_VERIFICATION_MODE {self.jwt_verification_mode!r} "
+                f"(expected one of {', '.join(VERIFICATION_MODES)}), using inline"
+            )
+            self.jwt_verification_mode = "inline"
+
+        self.token_cache = TokenCache(maxsize=self.jwt_cache_size, ttl=self.jwt_cache_ttl)
+        self.rejected_token_cache = TokenCache(
+            maxsize=self.jwt_negative_cache_size, ttl=self.jwt_negative_cache_ttl
+        )
+        self.key_store = KeyStore(
+            jwks_url=self.jwks_url,
+            refresh_interval=self.jwks_refresh_interval,
+            min_refetch_interval=self.jwks_min_refetch_interval,
+            connect_timeout=self.public_key_connect_timeout,
+            read_timeout=self.public_key_read_timeout,
+        )
+        self.verifiers = {}
+        if self.jwt_internal_issuer != "" and self.jwt_internal_key != "":
+            try:
+                self.register_verifier(
+                    self.jwt_internal_issuer, self.jwt_internal_key, self.jwt_internal_algorithm
+                )
+            except Exception as e:
+                logger.error("Invalid internal issuer key: " + str(e))
+
+        self.metrics_sink = MetricsSink()
+        if self.jwt_metrics == "prometheus":
+            self.set_metrics_sink(PrometheusMetricsSink())
+
+    def set_metrics_sink(self, metrics_sink: MetricsSink):
+        """Send authentication metrics (including cache usage) to the given sink."""
+        metrics_sink.add_cache("token", self.token_cache)
+        metrics_sink.add_cache("rejected_token", self.rejected_token_cache)
+        self.metrics_sink = metrics_sink
+
+    def register_verifier(self, issuer: str, key, algorithm: str) -> Verifier:
+        """Verify tokens of the given issuer with their own key and algorithm."""
+        verifier = Verifier(issuer, key, algorithm)
+        self.verifiers[issuer] = verifier
+        return verifier
+
+    @property
+    def public_key(self):
+        """Public key as PEM string.
+
+        If no key has been loaded yet (see update_public_key_async and lifespan), it is
+        loaded synchronously on first access.
+        """
+        if not self._public_key_loaded:
+            self.update_public_key()
+        return self._public_key
+
+    @public_key.setter
+    def public_key(self, public_key):
+        self._public_key_loaded = True
+        self._public_key = public_key
+        self._public_key_object = None
+
+    @property
+    def public_key_object(self):
+        """Public key parsed for jwt_algorithm, parsed once and reused for every request."""
+        # Until the key is loaded (and the key file refreshed if stale), the file is not read
+        if self.public_key_file_max_age > 0 and self._public_key_loaded:
+            self.reload_public_key_file()
+
+        if self.public_key is None or self.public_key == "":
+            return None
+
+        if self._public_key_object is None or self._public_key_object[0] != self.jwt_algorithm:
+            try:
+                key_object = load_public_key(self._public_key, self.jwt_algorithm)
+            except Exception as e:
+                logger.error("Could not parse public key: " + str(e))
+                return None
+            self._public_key_object = (self.jwt_algorithm, key_object)
+
+        return self._public_key_object[1]
 
     def update_public_key(self, public_key=None, public_key_file_path=None):
         """Update public key."""
+        self._public_key_loaded = True
         if public_key_file_path is not None:
             self.public_key_file_path = public_key_file_path
 
-        public_key = get_public_key(
-            public_key, self.public_key_url, self.public_key_file_path
-        )
+        if (public_key is None or public_key == "") and self.public_key_file_max_age > 0:
+            public_key = get_shared_public_key(
+                self.public_key_url,
+                self.public_key_file_path,
+                self.public_key_file_max_age,
+                self.jwt_algorithm,
+            )
+        else:
+            public_key = get_public_key(
+                public_key, self.public_key_url, self.public_key_file_path
+            )
+        self._set_public_key(public_key)
+
+    async def ensure_public_key_async(self):
+        """Load the public key without blocking the event loop, unless already loaded.
+
+        Concurrent callers wait for a single load.
+        """
+        if self._public_key_loaded:
+            return
+
+        import asyncio
+
+        if self._public_key_lock is None:
+            self._public_key_lock = asyncio.Lock()
+        async with self._public_key_lock:
+            if not self._public_key_loaded:
+                await self.update_public_key_async()
+
+    async def update_public_key_async(self, public_key=None, public_key_file_path=None):
+        """Update public key without blocking the event loop."""
+        try:
+            await self._update_public_key_async(public_key, public_key_file_path)
+        finally:
+            # Only once loaded, so that callers do not read the key while it is loading
+            self._public_key_loaded = True
+
+    async def _update_public_key_async(self, public_key=None, public_key_file_path=None):
+        if public_key_file_path is not None:
+            self.public_key_file_path = public_key_file_path
 
+        fetch_options = {
+            "connect_timeout": self.public_key_connect_timeout,
+            "read_timeout": self.public_key_read_timeout,
+            "retries": self.public_key_retries,
+        }
+        if (public_key is None or public_key == "") and self.public_key_file_max_age > 0:
+            public_key = await get_shared_public_key_async(
+                self.public_key_url,
+                self.public_key_file_path,
+                self.public_key_file_max_age,
+                self.jwt_algorithm,
+                **fetch_options,
+            )
+        else:
+            public_key = await get_public_key_async(
+                public_key, self.public_key_url, self.public_key_file_path, **fetch_options
+            )
+        self._set_public_key(public_key)
+
+    def reload_public_key_file(self):
+        """Reload the public key if another process changed the key file.
+
+        The file is checked at most once per coarse clock tick.
+        """
+        now = coarse_clock()
+        if now < self._public_key_file_checked_at + coarse_clock.tick:
+            return
+        self._public_key_file_checked_at = now
+
+        mtime = get_key_file_mtime(self.public_key_file_path)
+        if mtime is None or mtime == self._public_key_file_mtime:
+            return
+        self._public_key_file_mtime = mtime
+        public_key = get_public_key_from_file(self.public_key_file_path)
+        if public_key is not None and public_key != self._public_key:
+            logger.info("Public key file changed, reloading it")
+            self._set_public_key(public_key)
+
+    def _set_public_key(self, public_key):
+        """Validate and store a freshly loaded public key."""
         if public_key is not None and public_key != "":
+            try:
+                key_object = load_public_key(public_key, self.jwt_algorithm)
+            except Exception as e:
+                logger.error("Invalid public key: " + str(e))
+                return
+
+            if public_key != self._public_key:
+                self.token_cache.clear()
+                self.rejected_token_cache.clear()
             self.public_key = public_key
-            write_public_key_to_file(self.public_key, self.public_key_file_path)
+            self._public_key_object = (self.jwt_algorithm, key_object)
+            # A shared key file is only written with keys fetched from the URL
+            if self.public_key_file_max_age <= 0:
+                write_public_key_to_file(self.public_key, self.public_key_file_path)
+            self._public_key_file_mtime = get_key_file_mtime(self.public_key_file_path)
 
         else:
             logger.error("No public key available")
 
 
 config = Config()
+
+
+def init():
+    """Load public key and JWKS now instead of on first use."""
+    config.update_public_key()
+    if config.key_store.jwks_url != "":
+        config.key_store.refresh()
+
+
+async def init_async():
+    """Load public key and JWKS now, without blocking the event loop."""
+    await config.update_public_key_async()
+    if config.key_store.jwks_url != "":
+        await config.key_store.refresh_async()
+
+
+@asynccontextmanager
+async def lifespan(app=None):
+    """FastAPI lifespan that loads keys without blocking the event loop.
+
+    Use it as ```FastAPI(lifespan=lifespan)``` or enter it from the application's own
+    lifespan with ```async with lifespan(app):```.
+    """
+    await init_async()
+    if config.key_store.jwks_url != "":
+        config.key_store.start_background_refresh()
+    try:
+        yield
+    finally:
+        from mumichaspy.fastapi_jwt_chassis.executor import shutdown_executors
+
+        config.key_store.stop_background_refresh()
+        shutdown_executors()
@@ -0,0 +1,134 @@
+"""Executors that verify token signatures outside the event loop.
+
+JWT_VERIFICATION_MODE selects where signatures are verified:
+
+- inline: in the calling coroutine (default).
+- thread: in a bounded thread pool.
+- process: in a bounded process pool (waited for from the thread pool), for signature
+  backends that hold the GIL.
+
+Tokens up to JWT_INLINE_MAX_TOKEN_SIZE characters (0 by default, so every token is
+offloaded) are verified inline, for deployments where dispatching small tokens costs more
+than verifying them.
+"""
+
+import asyncio
+import functools
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from mumichaspy.fastapi_jwt_chassis.config import config
+
+logger = logging.getLogger(__name__)
+
+_thread_pool = None
+_process_pool = None
+# Parsed keys of a worker process, least recently used first
+WORKER_KEYS_MAXSIZE = 8
+_worker_keys = OrderedDict()
+
+
+def offload_token(encoded_token: str) -> bool:
+    """Whether the token has to be verified outside the event loop."""
+    if config.jwt_verification_mode == "inline":
+        return False
+    return len(encoded_token) > config.jwt_inline_max_token_size
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Get the verification thread pool, creating it if needed."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=config.jwt_verification_workers,
+            thread_name_prefix="jwt-verification",
+        )
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the verification process pool, creating it if needed."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=config.jwt_verification_workers)
+    return _process_pool
+
+
+def shutdown_executors():
+    """Shut down verification pools (they are created again when needed)."""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown()
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+async def run_verification(func, encoded_token: str, **kwargs):
+    """Call func(encoded_token=encoded_token, **kwargs), in the thread pool if needed."""
+    if not offload_token(encoded_token):
+        return func(encoded_token=encoded_token, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_thread_pool(), functools.partial(func, encoded_token=encoded_token, **kwargs)
+    )
+
+
+def decode_in_process(encoded_token: str, public_key, issuer: str, algorithms: list) -> dict:
+    """Decode the token in the process pool, blocking until it is done."""
+    future = get_process_pool().submit(
+        _decode_in_worker,
+        encoded_token,
+        serialize_public_key(public_key),
+        issuer,
+        list(algorithms),
+    )
+    return future.result()
+
+
+def decode_many_in_process(
+    encoded_tokens: list, public_key, issuer: str, algorithms: list
+) -> list:
+    """Decode tokens in the process pool, returning claims or the exception for each one."""
+    process_pool = get_process_pool()
+    serialized_public_key = serialize_public_key(public_key)
+    futures = [
+        process_pool.submit(
+            _decode_in_worker, encoded_token, serialized_public_key, issuer, list(algorithms)
+        )
+        for encoded_token in encoded_tokens
+    ]
+    return [future.exception() or future.result() for future in futures]
+
+
+def serialize_public_key(public_key):
+    """Return a picklable form (PEM bytes) of a parsed public key."""
+    if hasattr(public_key, "public_bytes"):
+        from cryptography.hazmat.primitives import serialization
+
+        return public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    return public_key
+
+
+def _decode_in_worker(encoded_token: str, public_key, issuer: str, algorithms: list) -> dict:
+    """Decode the token in a worker process, parsing each key once per process."""
+    import jwt
+    from jwt.algorithms import get_default_algorithms
+
+    key_id = (public_key, algorithms[0])
+    key_object = _worker_keys.get(key_id)
+    if key_object is None:
+        key_object = get_default_algorithms()[algorithms[0]].prepare_key(public_key)
+        _worker_keys[key_id] = key_object
+        while len(_worker_keys) > WORKER_KEYS_MAXSIZE:
+            _worker_keys.popitem(last=False)
+    else:
+        _worker_keys.move_to_end(key_id)
+
+    return jwt.decode(encoded_token, key_object, issuer=issuer, algorithms=algorithms)
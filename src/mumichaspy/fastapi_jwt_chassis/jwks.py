@@ -0,0 +1,191 @@
+"""JSON Web Key Set (JWKS) support: public keys indexed by kid."""
+
+import logging
+import random
+import re
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_REGEX = re.compile(r"max-age=(\d+)")
+
+
+def get_max_age(cache_control: str):
+    """Return max-age (in seconds) of a Cache-Control header, or None."""
+    if not cache_control or "no-cache" in cache_control or "no-store" in cache_control:
+        return None
+    match = MAX_AGE_REGEX.search(cache_control)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+class KeyStore:
+    """Public keys loaded from a JWKS endpoint, indexed by kid."""
+
+    def __init__(
+        self,
+        jwks_url: str = "",
+        refresh_interval: float = 3600,
+        min_refetch_interval: float = 30,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 5.0,
+        clock=time.monotonic,
+    ):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.clock = clock
+        self.keys = {}
+        self.etag = None
+        self.max_age = None
+        self._jwks_by_kid = {}
+        self._last_fetch = None
+        self._fetch_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+
+    def get_key(self, kid: str):
+        """Return the PyJWK for the given kid, or None."""
+        return self.keys.get(kid)
+
+    def load_jwks(self, jwks: dict):
+        """Replace stored keys with those of a JWKS document.
+
+        Keys that did not change keep their parsed object, unusable keys are skipped.
+        """
+        import jwt
+
+        keys = {}
+        jwks_by_kid = {}
+        for jwk in jwks.get("keys", []):
+            kid = jwk.get("kid")
+            if kid is None or jwk.get("use", "sig") != "sig":
+                continue
+            if self._jwks_by_kid.get(kid) == jwk:
+                keys[kid] = self.keys[kid]
+            else:
+                try:
+                    keys[kid] = jwt.PyJWK(jwk)
+                except Exception as e:
+                    logger.warning(f"Could not load JWK {kid}: {e}")
+                    continue
+            jwks_by_kid[kid] = jwk
+
+        self.keys = keys
+        self._jwks_by_kid = jwks_by_kid
+
+    def refresh(self) -> bool:
+        """Fetch the JWKS (conditionally, using ETag) and update stored keys."""
+        import httpx
+
+        if self.jwks_url is None or self.jwks_url == "":
+            logger.warning("No JWKS URL provided")
+            return False
+
+        with self._fetch_lock:
+            self._last_fetch = self.clock()
+            try:
+                with httpx.Client(timeout=self._timeout()) as client:
+                    response = client.get(self.jwks_url, headers=self._request_headers())
+                self._handle_response(response)
+            except Exception as e:
+                logger.warning("Could not load JWKS from URL: " + str(e))
+                return False
+
+        return True
+
+    async def refresh_async(self) -> bool:
+        """Fetch the JWKS like refresh, without blocking the event loop."""
+        import httpx
+
+        if self.jwks_url is None or self.jwks_url == "":
+            logger.warning("No JWKS URL provided")
+            return False
+
+        self._last_fetch = self.clock()
+        try:
+            async with httpx.AsyncClient(timeout=self._timeout()) as client:
+                response = await client.get(self.jwks_url, headers=self._request_headers())
+            self._handle_response(response)
+        except Exception as e:
+            logger.warning("Could not load JWKS from URL: " + str(e))
+            return False
+
+        return True
+
+    def refresh_unknown_kid(self, kid: str):
+        """Refetch the JWKS for an unknown kid, at most once per min_refetch_interval."""
+        if not self._refetch_allowed():
+            return None
+        self.refresh()
+        return self.get_key(kid)
+
+    async def refresh_unknown_kid_async(self, kid: str):
+        """Refetch the JWKS for an unknown kid like refresh_unknown_kid, asynchronously."""
+        if not self._refetch_allowed():
+            return None
+        await self.refresh_async()
+        return self.get_key(kid)
+
+    def _refetch_allowed(self) -> bool:
+        if self._last_fetch is None:
+            return True
+        return self.clock() - self._last_fetch >= self.min_refetch_interval
+
+    def _timeout(self):
+        import httpx
+
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def _request_headers(self) -> dict:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        return headers
+
+    def _handle_response(self, response):
+        if response.status_code == 304:
+            self.max_age = get_max_age(response.headers.get("Cache-Control"))
+            return
+
+        if response.status_code != 200:
+            raise Exception(f"Status code: {response.status_code}")
+
+        self.load_jwks(response.json())
+        self.etag = response.headers.get("ETag")
+        self.max_age = get_max_age(response.headers.get("Cache-Control"))
+
+    def next_refresh_delay(self) -> float:
+        """Seconds until next background refresh, jittered to spread load across pods."""
+        delay = self.refresh_interval
+        if self.max_age is not None:
+            delay = self.max_age
+        delay = max(delay, self.min_refetch_interval)
+        return delay * random.uniform(0.9, 1.1)  # nosec B311
+
+    def start_background_refresh(self):
+        """Refresh keys periodically in a daemon thread."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name="jwks-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.next_refresh_delay()):
+            self.refresh()
@@ -0,0 +1,116 @@
+"""Public key file shared by the worker processes of a node.
+
+Writes are atomic (write to a temporary file, then rename), so readers never see a torn
+key, and a lock file serializes fetches so that only one worker fetches a stale key.
+"""
+
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+
+# Mode of new key files (public keys are readable by everyone)
+PUBLIC_KEY_FILE_MODE = 0o644
+
+
+def get_key_file_mtime(file_path: str):
+    """Return the modification time of the key file, or None if it does not exist."""
+    try:
+        return os.stat(file_path).st_mtime
+    except OSError:
+        return None
+
+
+def read_fresh_key_file(file_path: str, max_age: float, clock=time.time):
+    """Return the content of the key file if it is younger than max_age seconds, or None."""
+    mtime = get_key_file_mtime(file_path)
+    if mtime is None or clock() - mtime > max_age:
+        return None
+    try:
+        with open(file_path, "r") as f:
+            return f.read() or None
+    except OSError:
+        return None
+
+
+def write_key_file(content: str, file_path: str, refresh_mtime: bool = False) -> bool:
+    """Atomically replace the key file with content, unless it already has it.
+
+    With refresh_mtime, a file that already has the content gets its modification time
+    updated, so that the key is seen as fresh again (use it only for freshly fetched keys).
+    The file keeps its mode, new files get PUBLIC_KEY_FILE_MODE. Returns whether the file
+    was written.
+    """
+    try:
+        with open(file_path, "r") as f:
+            if f.read() == content:
+                if refresh_mtime:
+                    os.utime(file_path)
+                return False
+    except OSError:
+        pass
+
+    try:
+        mode = os.stat(file_path).st_mode & 0o7777
+    except OSError:
+        mode = PUBLIC_KEY_FILE_MODE
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".public_key.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            os.fchmod(f.fileno(), mode)
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+class KeyFileLock:
+    """Exclusive lock (file_path + ".lock") on the key file, shared between processes.
+
+    Uses fcntl.flock where available; elsewhere it does not lock anything.
+    """
+
+    def __init__(self, file_path: str):
+        self.lock_path = file_path + ".lock"
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock, returning False if blocking is False and it is taken."""
+        lock_file = open(self.lock_path, "a")
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file.fileno(), flags)
+            except BlockingIOError:
+                lock_file.close()
+                return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        """Release the lock."""
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,130 @@
+"""Metrics of the authentication hot path (stage latencies, failures, cache usage)."""
+
+import threading
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+)
+
+STAGE_SECONDS = "jwt_auth_stage_seconds"
+FAILURES_TOTAL = "jwt_auth_failures_total"
+
+
+class MetricsSink:
+    """Receives authentication metrics. This default implementation discards them."""
+
+    enabled = False
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        """Record a value (e.g. a latency in seconds) in a histogram."""
+
+    def increment(self, name: str, labels: dict = None, value: float = 1):
+        """Increment a counter."""
+
+    def add_cache(self, name: str, cache):
+        """Expose hit/miss counters of a TokenCache."""
+
+
+class PrometheusMetricsSink(MetricsSink):
+    """Keeps metrics in memory and renders them in Prometheus text format."""
+
+    enabled = True
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        key = (name, labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            bucket_counts = histogram[0]
+            for i, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    bucket_counts[i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name: str, labels: dict = None, value: float = 1):
+        key = (name, labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_cache(self, name: str, cache):
+        self._caches[name] = cache
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        last_name = None
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name != last_name:
+                lines.append(f"# TYPE {name} histogram")
+                last_name = name
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", repr(bucket)),)
+                lines.append(f"{name}_bucket{format_labels(bucket_labels)} {cumulative}")
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        last_name = None
+        for (name, labels), value in counters:
+            if name != last_name:
+                lines.append(f"# TYPE {name} counter")
+                last_name = name
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        cache_metrics = [
+            ("jwt_cache_hits_total", "counter", "hits"),
+            ("jwt_cache_misses_total", "counter", "misses"),
+            ("jwt_cache_size", "gauge", "size"),
+        ]
+        cache_stats = {name: cache.stats() for name, cache in sorted(self._caches.items())}
+        for metric, metric_type, stat in cache_metrics:
+            if cache_stats:
+                lines.append(f"# TYPE {metric} {metric_type}")
+            for name, stats in cache_stats.items():
+                lines.append(f"{metric}{format_labels((('cache', name),))} {stats[stat]}")
+        if cache_stats:
+            lines.append("# TYPE jwt_cache_hit_ratio gauge")
+        for name, stats in cache_stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / lookups if lookups > 0 else 0.0
+            lines.append(f"jwt_cache_hit_ratio{format_labels((('cache', name),))} {ratio}")
+
+        return "\n".join(lines) + "\n"
+
+
+def labels_key(labels: dict = None) -> tuple:
+    """Return a hashable, ordered version of labels."""
+    if not labels:
+        return ()
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(labels: tuple) -> str:
+    """Format labels as {name="value",...}."""
+    if not labels:
+        return ""
+    formatted = ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+    return "{" + formatted + "}"
+
+
+def escape_label_value(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
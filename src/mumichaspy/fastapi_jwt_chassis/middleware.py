@@ -0,0 +1,88 @@
+"""ASGI middleware that authenticates every request at the edge, before routing."""
+
+import logging
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.websockets import WebSocketClose
+
+from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.metrics import FAILURES_TOTAL
+from mumichaspy.fastapi_jwt_chassis.validation import (
+    REQUEST_STATE_KEY,
+    decode_bearer_token,
+    raise_and_log_error,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JWTAuthenticationMiddleware:  # pylint: disable=too-few-public-methods
+    """Validates the bearer token of every HTTP and websocket request whose path is not public.
+
+    Claims are stored in the request state (request.state.jwt), where JWTBearer
+    dependencies find them, so routes can still use JWTBearer or require_roles without
+    verifying the token again. Requests without a valid token get a 401 response (websocket
+    connections are closed with code 1008) and do not reach the application.
+    """
+
+    def __init__(self, app, public_paths=()):
+        self.app = app
+        self.public_paths = tuple(public_paths)
+        # Prefixes matching the paths below a public path (path segment boundaries)
+        self._public_prefixes = tuple(path.rstrip("/") + "/" for path in self.public_paths)
+
+    def is_public_path(self, path: str) -> bool:
+        """Whether path is a public path or below one (/docs matches /docs/x, not /docsx)."""
+        return path in self.public_paths or path.startswith(self._public_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" or self.is_public_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            encoded_token = get_bearer_token(scope)
+            decoded_jwt = await decode_bearer_token(encoded_token)
+        except HTTPException as exc:
+            if scope["type"] == "websocket":
+                # Closing before the handshake rejects the connection (HTTP 403)
+                response = WebSocketClose(
+                    code=status.WS_1008_POLICY_VIOLATION, reason=str(exc.detail)
+                )
+            else:
+                response = JSONResponse(
+                    {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+                )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})[REQUEST_STATE_KEY] = (encoded_token, decoded_jwt)
+        await self.app(scope, receive, send)
+
+
+def get_bearer_token(scope) -> str:
+    """Return the bearer token of the Authorization header of an ASGI scope."""
+    authorization = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+
+    if not authorization:
+        config.metrics_sink.increment(FAILURES_TOTAL, {"reason": "missing_credentials"})
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    scheme, _, encoded_token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not encoded_token:
+        raise_and_log_error(
+            logger,
+            status.HTTP_401_UNAUTHORIZED,
+            "Invalid authentication scheme",
+            reason="invalid_scheme",
+        )
+    return encoded_token
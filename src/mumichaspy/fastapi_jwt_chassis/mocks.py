@@ -1,10 +1,9 @@
+import json
 import jwt
+from jwt.algorithms import RSAAlgorithm
 from mumichaspy.fastapi_jwt_chassis.config import config
-from mumichaspy.fastapi_jwt_chassis.time import (
-    current_timestamp,
-    current_timestamp_with_timedelta,
-    DEFAULT_TIMEDELTA,
-)
+from mumichaspy.fastapi_jwt_chassis.signing import TokenSigner
+from mumichaspy.fastapi_jwt_chassis.time import DEFAULT_TIMEDELTA
 
 TESTING_PUBLIC_KEY = """
 -----BEGIN PUBLIC KEY-----
@@ -33,6 +32,10 @@ Yry7sMZjJebtIn+74QJBAOXUcGRQG6rJgWcI43mr40L1JanOPTuZvRHd2XfT9zkd
 -----END RSA PRIVATE KEY-----
 """
 
+TESTING_KID = "testing-key"
+
+_testing_signer = None
+
 DECODED_MOCK_JWT = {
     "sub": 1,
     "username": "jdoe",
@@ -52,13 +55,24 @@ DECODED_ADMIN_MOCK_JWT = {
 }
 
 
-def get_encoded_mock_jwt(jwt_payload):
-    """Get an encoded JWT."""
-    if "iat" not in jwt_payload:
-        jwt_payload["iat"] = current_timestamp()
-    if "exp" not in jwt_payload:
-        jwt_payload["exp"] = current_timestamp_with_timedelta(seconds=DEFAULT_TIMEDELTA)
-    return jwt.encode(jwt_payload, TESTING_PRIVATE_KEY, algorithm="RS256")
+def get_mock_jwks(kid: str = TESTING_KID):
+    """Get a JWKS document containing the testing public key."""
+    public_key = RSAAlgorithm(RSAAlgorithm.SHA256).prepare_key(TESTING_PUBLIC_KEY)
+    jwk = json.loads(RSAAlgorithm.to_jwk(public_key))
+    return {"keys": [{**jwk, "kid": kid, "use": "sig", "alg": "RS256"}]}
+
+
+def get_testing_signer() -> TokenSigner:
+    """Get the signer of the testing private key (created once)."""
+    global _testing_signer
+    if _testing_signer is None:
+        _testing_signer = TokenSigner(TESTING_PRIVATE_KEY, algorithm="RS256")
+    return _testing_signer
+
+
+def get_encoded_mock_jwt(jwt_payload, headers: dict = None):
+    """Get an encoded JWT, adding iat and exp claims if missing (jwt_payload is not modified)."""
+    return get_testing_signer().sign(jwt_payload, lifetime=DEFAULT_TIMEDELTA, headers=headers)
 
 
 def mock_jwt_decode_error(encoded_token, public_key, issuer, algorithms):
@@ -101,7 +115,7 @@ def assert_token_validation_called(mock_validate_and_decode_token, encoded_token
     """Assert mock validate and decode token was called."""
     mock_validate_and_decode_token.assert_called_once_with(
         encoded_token=encoded_token,
-        public_key=config.public_key,
+        public_key=config.public_key_object,
         issuer=config.jwt_issuer,
         algorithms=[config.jwt_algorithm],
     )
@@ -0,0 +1,287 @@
+"""Issuer stand-in that serves public keys and mints tokens, for tests and benchmarks.
+
+IssuerStandIn is an ASGI app and can also be served on localhost (in a background
+thread, with the standard library HTTP server), so that key fetching and refreshing can
+be exercised without a network:
+
+    with IssuerStandIn(latency=0.05) as issuer:
+        config.public_key_url = issuer.url + PUBLIC_KEY_PATH
+        config.jwks_url = issuer.url + JWKS_PATH
+        token = issuer.mint({"sub": "1"})
+
+It can also be run standalone: python -m mumichaspy.fastapi_jwt_chassis.testing_issuer
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jwt.algorithms import RSAAlgorithm
+
+from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.mocks import (
+    TESTING_KID,
+    TESTING_PRIVATE_KEY,
+    TESTING_PUBLIC_KEY,
+)
+from mumichaspy.fastapi_jwt_chassis.signing import TokenSigner
+from mumichaspy.fastapi_jwt_chassis.time import DEFAULT_TIMEDELTA
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_KEY_PATH = "/public-key"
+JWKS_PATH = "/.well-known/jwks.json"
+TOKEN_PATH = "/token"
+
+
+class IssuerStandIn:
+    """In-process RS256 issuer serving its public key (PEM and JWKS) and minting tokens.
+
+    latency (seconds) delays every response, failure_rate is the probability of answering
+    503 and fail_next forces the next responses to fail. rotate_key replaces the signing
+    key (the previous ones stay in the JWKS unless told otherwise). The first key is the
+    testing key of mocks.
+    """
+
+    def __init__(
+        self,
+        issuer: str = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        jwks_max_age: int = 300,
+        key_size: int = 2048,
+    ):
+        self.issuer = config.jwt_issuer if issuer is None else issuer
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.jwks_max_age = jwks_max_age
+        self.key_size = key_size
+        self.requests = {}
+        self.url = None
+        self._keys = []
+        self._rotations = 0
+        self._signer = None
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._server_thread = None
+        self.add_key(TESTING_KID, TESTING_PRIVATE_KEY, TESTING_PUBLIC_KEY)
+
+    @property
+    def kid(self) -> str:
+        """kid of the current signing key."""
+        return self._keys[-1][0]
+
+    @property
+    def public_key(self) -> str:
+        """PEM public key of the current signing key."""
+        return self._keys[-1][1]
+
+    def add_key(self, kid: str, private_key, public_key: str):
+        """Make the given key the current signing key."""
+        with self._lock:
+            self._keys.append((kid, public_key))
+            self._signer = TokenSigner(private_key, algorithm="RS256", headers={"kid": kid})
+
+    def rotate_key(self, keep_previous: bool = True) -> str:
+        """Sign with a newly generated key and return its kid."""
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=self.key_size)
+        public_key = (
+            private_key.public_key()
+            .public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            .decode()
+        )
+        with self._lock:
+            self._rotations += 1
+            kid = f"key-{self._rotations + 1}"
+            if not keep_previous:
+                self._keys.clear()
+        self.add_key(kid, private_key, public_key)
+        return kid
+
+    def get_jwks(self) -> dict:
+        """Get the JWKS document with every published key."""
+        algorithm = RSAAlgorithm(RSAAlgorithm.SHA256)
+        keys = []
+        for kid, public_key in self._keys:
+            jwk = json.loads(RSAAlgorithm.to_jwk(algorithm.prepare_key(public_key)))
+            keys.append({**jwk, "kid": kid, "use": "sig", "alg": "RS256"})
+        return {"keys": keys}
+
+    def mint(self, claims: dict = None, lifetime: float = DEFAULT_TIMEDELTA) -> str:
+        """Sign a token with the current key (iss, iat and exp are added if missing)."""
+        return self._signer.sign({"iss": self.issuer, **(claims or {})}, lifetime=lifetime)
+
+    def mint_many(self, claims_list: list, lifetime: float = DEFAULT_TIMEDELTA) -> list:
+        """Sign several tokens with the current key."""
+        return self._signer.sign_many(
+            [{"iss": self.issuer, **claims} for claims in claims_list], lifetime=lifetime
+        )
+
+    def fail_next(self, count: int = 1, status_code: int = 503):
+        """Answer the next count requests with the given status code."""
+        with self._lock:
+            self._failures.extend([status_code] * count)
+
+    def _next_failure(self):
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+        if self.failure_rate > 0 and random.random() < self.failure_rate:  # nosec B311
+            return 503
+        return None
+
+    def handle(self, method: str, path: str, headers: dict, body: bytes = b"") -> tuple:
+        """Handle a request (without latency) and return (status, headers, body).
+
+        headers names must be lower case.
+        """
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+        status_code = self._next_failure()
+        if status_code is not None:
+            return status_code, {"content-type": "text/plain"}, b"Failure injected"
+
+        if method == "GET" and path == PUBLIC_KEY_PATH:
+            return 200, {"content-type": "text/plain"}, self.public_key.encode()
+
+        if method == "GET" and path == JWKS_PATH:
+            content = json.dumps(self.get_jwks()).encode()
+            etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+            response_headers = {
+                "etag": etag,
+                "cache-control": f"max-age={self.jwks_max_age}",
+            }
+            if headers.get("if-none-match") == etag:
+                return 304, response_headers, b""
+            return 200, {**response_headers, "content-type": "application/json"}, content
+
+        if method == "POST" and path == TOKEN_PATH:
+            try:
+                claims = json.loads(body or b"{}")
+            except ValueError:
+                return 400, {"content-type": "text/plain"}, b"Invalid JSON"
+            content = json.dumps({"access_token": self.mint(claims), "token_type": "bearer"})
+            return 200, {"content-type": "application/json"}, content.encode()
+
+        return 404, {"content-type": "text/plain"}, b"Not found"
+
+    async def __call__(self, scope, receive, send):
+        """ASGI entry point."""
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]
+        }
+        status_code, response_headers, content = self.handle(
+            scope["method"], scope["path"], headers, body
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response_headers.items()
+                ]
+                + [(b"content-length", str(len(content)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the issuer on localhost in a daemon thread and return its URL."""
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                self.respond()
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if issuer.latency > 0:
+                    time.sleep(issuer.latency)
+                headers = {name.lower(): value for name, value in self.headers.items()}
+                status_code, response_headers, content = issuer.handle(
+                    self.command, self.path.split("?")[0], headers, body
+                )
+                self.send_response(status_code)
+                for name, value in response_headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="issuer-stand-in", daemon=True
+        )
+        self._server_thread.start()
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+        return self.url
+
+    def stop(self):
+        """Stop serving on localhost."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join()
+            self._server = None
+            self._server_thread = None
+            self.url = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve an issuer stand-in on localhost.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stand_in = IssuerStandIn(latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Serving issuer stand-in on {stand_in.start(port=args.port)}")
+    try:
+        stand_in._server_thread.join()
+    except KeyboardInterrupt:
+        stand_in.stop()
@@ -1,35 +1,81 @@
-"""Module to manage time related calculations."""
+"""Module to manage time related calculations.
 
+Timestamps are computed from the epoch clock (they do not depend on any timezone), so
+they avoid building timezone aware datetimes. Timezones are looked up once and cached;
+TIMEZONE_BACKEND selects pytz (default) or the standard library zoneinfo (Python 3.9+).
+
+Clocks are callables returning the current epoch time in seconds. coarse_clock is shared
+by caches and other layers that only need second resolution; tests can inject a
+FrozenClock instead.
+"""
+
+import logging
 import os
+import time
 from datetime import datetime, timedelta
-from pytz import timezone
+from functools import lru_cache
+
 
+logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEDELTA = 15 * 60  # 15 minutes
 default_timezone_str = os.getenv("TZ", "Europe/Madrid")
+timezone_backend = os.getenv("TIMEZONE_BACKEND", "pytz")
 
 
-def current_timestamp() -> int:
-    """Return current timestamp."""
-    return int(current_datetime().timestamp())
-    # return int(time.time())
+@lru_cache(maxsize=None)
+def get_timezone(time_zone_str: str = default_timezone_str, backend: str = None):
+    """Return the (cached) timezone object for the given name."""
+    if backend is None:
+        backend = timezone_backend
+
+    if backend == "zoneinfo":
+        try:
+            from zoneinfo import ZoneInfo
 
+            return ZoneInfo(time_zone_str)
+        except ImportError:
+            logger.warning("zoneinfo is not available, using pytz")
 
-# def current_timestamp_with_timedelta(delta_in_seconds: int = DEFAULT_TIMEDELTA) -> int:
-#     """Return current timestamp plus a timedelta."""
-#     return current_timestamp() + delta_in_seconds
+    from pytz import timezone
+
+    return timezone(time_zone_str)
+
+
+def timedelta_seconds(
+    days: float = 0,
+    seconds: float = 0,
+    microseconds: float = 0,
+    milliseconds: float = 0,
+    minutes: float = 0,
+    hours: float = 0,
+    weeks: float = 0,
+) -> float:
+    """Return the number of seconds of a timedelta without building it."""
+    return (
+        weeks * 604800
+        + days * 86400
+        + hours * 3600
+        + minutes * 60
+        + seconds
+        + milliseconds / 1000
+        + microseconds / 1000000
+    )
+
+
+def current_timestamp() -> int:
+    """Return current timestamp."""
+    return int(time.time())
 
 
 def current_datetime(time_zone_str=default_timezone_str) -> datetime:
     """Generate current datetime for given timezone."""
-    time_zone = timezone(time_zone_str)
-    return datetime.now(time_zone)
+    return datetime.now(get_timezone(time_zone_str))
 
 
 def datetime_from_timestamp(timestamp, time_zone_str=default_timezone_str) -> datetime:
     """Return datetime for the given timestamp."""
-    time_zone = timezone(time_zone_str)
-    return datetime.fromtimestamp(timestamp, tz=time_zone)
+    return datetime.fromtimestamp(timestamp, tz=get_timezone(time_zone_str))
 
 
 def current_datetime_with_timedelta(
@@ -65,15 +111,60 @@ def current_timestamp_with_timedelta(
     hours: float = 0,
     weeks: float = 0,
 ) -> int:
-    """Get current timestamp plus a timedelta."""
-    ret_datetime = current_datetime_with_timedelta(
-        time_zone=time_zone,
-        days=days,
-        seconds=seconds,
-        microseconds=microseconds,
-        milliseconds=milliseconds,
-        minutes=minutes,
-        hours=hours,
-        weeks=weeks,
+    """Get current timestamp plus a timedelta.
+
+    time_zone is kept for compatibility, timestamps do not depend on it.
+    """
+    return int(
+        time.time()
+        + timedelta_seconds(
+            days=days,
+            seconds=seconds,
+            microseconds=microseconds,
+            milliseconds=milliseconds,
+            minutes=minutes,
+            hours=hours,
+            weeks=weeks,
+        )
     )
-    return int(ret_datetime.timestamp())
+
+
+class CoarseClock:
+    """Epoch clock that reads the system clock at most once per tick.
+
+    Ticks are measured with the monotonic clock, and the returned time never goes
+    backwards. It may lag behind the system clock by up to one tick.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        self.tick = tick
+        self._now = time.time()
+        self._next_update = time.monotonic() + tick
+
+    def __call__(self) -> float:
+        monotonic = time.monotonic()
+        if monotonic >= self._next_update:
+            self._next_update = monotonic + self.tick
+            now = time.time()
+            if now > self._now:
+                self._now = now
+        return self._now
+
+
+class FrozenClock:
+    """Clock that only moves when told to (e.g. for tests)."""
+
+    tick = 0
+
+    def __init__(self, now: float = None):
+        self.now = time.time() if now is None else now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        """Move the clock forward."""
+        self.now += seconds
+
+
+coarse_clock = CoarseClock(tick=float(os.getenv("COARSE_CLOCK_TICK", "1")))
@@ -1,97 +1,528 @@
 """Security module for JWT validation."""
 
+import functools
 import logging
-from fastapi import Request, status, HTTPException
+import threading
+import time
+from fastapi import Depends, Request, status, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 import jwt
+from mumichaspy.fastapi_jwt_chassis.claims import Claims
 from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.executor import (
+    decode_in_process,
+    decode_many_in_process,
+    get_thread_pool,
+    offload_token,
+    run_verification,
+)
+from mumichaspy.fastapi_jwt_chassis.metrics import FAILURES_TOTAL, STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+REQUEST_STATE_KEY = "jwt"
+
 
 def validate_and_decode_token(
     encoded_token: str,
-    public_key: str = config.public_key,
-    issuer: str = config.jwt_issuer,
+    public_key=None,
+    issuer: str = None,
     algorithms: str = None,
 ) -> dict:
-    """Decode JWT if validates."""
-    if algorithms is None or len(algorithms) == 0:
-        algorithms = [config.jwt_algorithm]
+    """Decode JWT if validates.
+
+    public_key may be a PEM string or an already parsed key object (see
+    config.public_key_object), the latter avoids parsing the key on every call.
+    When not given, the key is selected for the token like JWTBearer does (issuer
+    verifier, JWKS kid or configured key), and so are issuer and algorithms.
+    """
+    public_key, issuer, algorithms = get_verification_parameters(
+        public_key, issuer, algorithms, encoded_token=encoded_token
+    )
+
+    token_cache = config.token_cache
+    cache_context = (public_key, issuer, tuple(algorithms))
+    if token_cache.enabled:
+        decoded_token = token_cache.get(encoded_token, cache_context)
+        if decoded_token is not None:
+            return decoded_token
+
+    # Recently rejected tokens are rejected again without decoding them
+    rejected_token_cache = config.rejected_token_cache
+    if rejected_token_cache.enabled:
+        rejection = rejected_token_cache.get(encoded_token, cache_context)
+        if rejection is not None:
+            raise_and_log_error(
+                logger,
+                status.HTTP_401_UNAUTHORIZED,
+                "Could not decode JWT",
+                f"Could not decode JWT (recently rejected): {rejection['reason']}",
+                reason="rejected_token",
+            )
 
     decoded_token = {}
     try:
-        decoded_token = jwt.decode(
-            encoded_token, public_key, issuer=issuer, algorithms=algorithms
-        )
+        if config.jwt_verification_mode == "process" and offload_token(encoded_token):
+            decoded_token = decode_in_process(encoded_token, public_key, issuer, algorithms)
+        else:
+            decoded_token = jwt.decode(
+                encoded_token, public_key, issuer=issuer, algorithms=algorithms
+            )
     except Exception as exc:
+        # Not yet valid tokens may become valid before the entry expires
+        if rejected_token_cache.enabled and not isinstance(
+            exc, jwt.exceptions.ImmatureSignatureError
+        ):
+            rejected_token_cache.set(encoded_token, {"reason": str(exc)}, cache_context)
         raise_and_log_error(
             logger,
             status.HTTP_401_UNAUTHORIZED,
             "Could not decode JWT",
             f"Could not decode JWT: {exc}",
+            reason="invalid_token",
         )
+
+    if token_cache.enabled:
+        token_cache.set(encoded_token, decoded_token, cache_context)
     return decoded_token
 
 
+def validate_and_decode_tokens(
+    encoded_tokens: list,
+    public_key=None,
+    issuer: str = None,
+    algorithms: list = None,
+) -> list:
+    """Decode several JWTs without raising.
+
+    Returns, in the same order as encoded_tokens, the decoded token or the exception that
+    rejected it. Without public_key, the key of each token is selected like JWTBearer does.
+    Identical tokens are verified once and, unless JWT_VERIFICATION_MODE is inline, tokens
+    are verified concurrently in the verification pool (grouped by key).
+    """
+    token_cache = config.token_cache
+    results = {}
+    # Key objects are not hashable, tokens are grouped by key identity
+    pending_groups = {}
+    for encoded_token in dict.fromkeys(encoded_tokens):
+        try:
+            token_public_key, token_issuer, token_algorithms = get_verification_parameters(
+                public_key, issuer, algorithms, encoded_token=encoded_token
+            )
+        except Exception as exc:
+            # E.g. unknown kid
+            results[encoded_token] = exc
+            continue
+
+        cache_context = (token_public_key, token_issuer, tuple(token_algorithms))
+        decoded_token = None
+        if token_cache.enabled:
+            decoded_token = token_cache.get(encoded_token, cache_context)
+        if decoded_token is None:
+            group_key = (id(token_public_key), token_issuer, cache_context[2])
+            pending_groups.setdefault(group_key, (cache_context, []))[1].append(encoded_token)
+        else:
+            results[encoded_token] = decoded_token
+
+    rejected = 0
+    pending = 0
+    for cache_context, pending_tokens in pending_groups.values():
+        token_public_key, token_issuer, token_algorithms = cache_context
+        decoded_tokens = decode_tokens_or_errors(
+            pending_tokens, token_public_key, token_issuer, list(token_algorithms)
+        )
+        pending += len(pending_tokens)
+        for encoded_token, decoded_token in zip(pending_tokens, decoded_tokens):
+            results[encoded_token] = decoded_token
+            if isinstance(decoded_token, Exception):
+                rejected += 1
+            elif token_cache.enabled:
+                token_cache.set(encoded_token, decoded_token, cache_context)
+    if rejected > 0:
+        logger.warning(f"Could not decode {rejected} of {pending} JWTs")
+
+    ordered_results = []
+    for encoded_token in encoded_tokens:
+        result = results[encoded_token]
+        ordered_results.append(result if isinstance(result, Exception) else dict(result))
+    return ordered_results
+
+
+def decode_tokens_or_errors(
+    encoded_tokens: list, public_key, issuer: str, algorithms: list
+) -> list:
+    """Decode tokens of the same key, in the verification pool if configured."""
+    if config.jwt_verification_mode == "process" and len(encoded_tokens) > 1:
+        return decode_many_in_process(encoded_tokens, public_key, issuer, algorithms)
+    if config.jwt_verification_mode == "thread" and len(encoded_tokens) > 1:
+        return list(
+            get_thread_pool().map(
+                functools.partial(
+                    decode_token_or_error,
+                    public_key=public_key,
+                    issuer=issuer,
+                    algorithms=algorithms,
+                ),
+                encoded_tokens,
+            )
+        )
+    return [
+        decode_token_or_error(encoded_token, public_key, issuer, algorithms)
+        for encoded_token in encoded_tokens
+    ]
+
+
+def decode_token_or_error(encoded_token: str, public_key, issuer: str, algorithms: list):
+    """Return the decoded token, or the exception raised while decoding it."""
+    try:
+        return jwt.decode(encoded_token, public_key, issuer=issuer, algorithms=algorithms)
+    except Exception as exc:
+        return exc
+
+
+def get_verification_parameters(
+    public_key=None, issuer: str = None, algorithms: list = None, encoded_token: str = None
+):
+    """Return key, issuer and algorithms, replacing missing ones with configured values.
+
+    With encoded_token and no public_key, they are selected for the token instead (see
+    get_verification_parameters_for_token).
+    """
+    if public_key is None and encoded_token is not None:
+        public_key, token_issuer, token_algorithms = get_verification_parameters_for_token(
+            encoded_token
+        )
+        if issuer is None:
+            issuer = token_issuer
+        if algorithms is None or len(algorithms) == 0:
+            algorithms = token_algorithms
+    if public_key is None:
+        public_key = config.public_key_object
+    if issuer is None:
+        issuer = config.jwt_issuer
+    if algorithms is None or len(algorithms) == 0:
+        algorithms = [config.jwt_algorithm]
+    return public_key, issuer, algorithms
+
+
+def get_token_kid(encoded_token: str):
+    """Return the kid of the token header if keys are selected from a JWKS, else None."""
+    if config.key_store.jwks_url == "":
+        return None
+
+    try:
+        return jwt.get_unverified_header(encoded_token).get("kid")
+    except jwt.exceptions.DecodeError:
+        # Malformed token, let validate_and_decode_token reject it
+        return None
+
+
+def get_public_key_for_token(encoded_token: str):
+    """Return the key to verify the token: JWKS key matching its kid or configured key."""
+    kid = get_token_kid(encoded_token)
+    if kid is None:
+        return config.public_key_object
+
+    jwk = config.key_store.get_key(kid)
+    if jwk is None:
+        jwk = config.key_store.refresh_unknown_kid(kid)
+    return get_jwk_key(jwk, kid)
+
+
+async def get_public_key_for_token_async(encoded_token: str):
+    """Like get_public_key_for_token, but loads the key or refetches the JWKS without blocking."""
+    kid = get_token_kid(encoded_token)
+    if kid is None:
+        # Without lifespan, the key is loaded on first use
+        await config.ensure_public_key_async()
+        return config.public_key_object
+
+    jwk = config.key_store.get_key(kid)
+    if jwk is None:
+        jwk = await config.key_store.refresh_unknown_kid_async(kid)
+    return get_jwk_key(jwk, kid)
+
+
+def get_issuer_verifier(encoded_token: str):
+    """Return the verifier registered for the (unverified) issuer of the token, or None."""
+    if not config.verifiers:
+        return None
+
+    try:
+        issuer = jwt.decode(encoded_token, options={"verify_signature": False}).get("iss")
+    except jwt.exceptions.DecodeError:
+        # Malformed token, let validate_and_decode_token reject it
+        return None
+
+    return config.verifiers.get(issuer)
+
+
+def get_verification_parameters_for_token(encoded_token: str) -> tuple:
+    """Return key, issuer and algorithms to verify the token with, refetching synchronously.
+
+    Tokens whose issuer has a registered verifier (see config.register_verifier) use its
+    key and algorithm, any other token uses the configured public key or JWKS.
+    """
+    verifier = get_issuer_verifier(encoded_token)
+    if verifier is not None:
+        return verifier.key, verifier.issuer, verifier.algorithms
+
+    return get_public_key_for_token(encoded_token), config.jwt_issuer, [config.jwt_algorithm]
+
+
+async def get_verification_parameters_for_token_async(encoded_token: str) -> tuple:
+    """Like get_verification_parameters_for_token, but refetches the JWKS without blocking."""
+    verifier = get_issuer_verifier(encoded_token)
+    if verifier is not None:
+        return verifier.key, verifier.issuer, verifier.algorithms
+
+    return (
+        await get_public_key_for_token_async(encoded_token),
+        config.jwt_issuer,
+        [config.jwt_algorithm],
+    )
+
+
+def get_jwk_key(jwk, kid: str):
+    """Return the key object of a JWK, rejecting the token if there is none."""
+    if jwk is None:
+        raise_and_log_error(
+            logger,
+            status.HTTP_401_UNAUTHORIZED,
+            "Could not decode JWT",
+            f"Could not decode JWT: unknown key id {kid}",
+            reason="unknown_key",
+        )
+    return jwk.key
+
+
 class JWTBearer(HTTPBearer):  # pylint: disable=too-few-public-methods
-    """HTTPBearer implementation for JWT validation."""
+    """HTTPBearer implementation for JWT validation.
 
-    def __init__(self, auto_error: bool = True):
+    Returns the decoded JWT as a dict, or as a Claims object if as_claims is True.
+    """
+
+    def __init__(self, auto_error: bool = True, as_claims: bool = False):
         super().__init__(auto_error=auto_error)
+        self.as_claims = as_claims
 
     async def __call__(self, request: Request):
+        measure = config.metrics_sink.enabled
+        start = time.perf_counter() if measure else 0
+
         # Get credentials from header
-        credentials: HTTPAuthorizationCredentials = await super().__call__(request)
+        try:
+            credentials: HTTPAuthorizationCredentials = await super().__call__(request)
+        except HTTPException:
+            config.metrics_sink.increment(FAILURES_TOTAL, {"reason": "missing_credentials"})
+            raise
 
         # Check credential scheme
         if not credentials.scheme == "Bearer":
             raise_and_log_error(
-                logger, status.HTTP_401_UNAUTHORIZED, "Invalid authentication scheme"
+                logger,
+                status.HTTP_401_UNAUTHORIZED,
+                "Invalid authentication scheme",
+                reason="invalid_scheme",
             )
+        if measure:
+            start = observe_stage("header", start)
 
-        # Check if token is valid
-        decoded_jwt = validate_and_decode_token(
-            encoded_token=credentials.credentials,
-            public_key=config.public_key,
-            issuer=config.jwt_issuer,
-            algorithms=[config.jwt_algorithm],
-        )
-
-        # Check issuer
-        if decoded_jwt["iss"] != config.jwt_issuer:
-            raise_and_log_error(
-                logger, status.HTTP_401_UNAUTHORIZED, "Invalid JWT issuer."
-            )
+        # Reuse the JWT if another dependency already decoded it in this request
+        decoded_jwt = get_request_jwt(request, credentials.credentials)
+        if decoded_jwt is None:
+            decoded_jwt = await decode_bearer_token(credentials.credentials)
+            set_request_jwt(request, credentials.credentials, decoded_jwt)
 
         # Return decoded JWT
+        if self.as_claims:
+            return Claims.from_dict(decoded_jwt)
         return decoded_jwt
 
 
 class JWTBearerAdmin(JWTBearer):  # pylint: disable=too-few-public-methods
     """HTTPBearer implementation for JWT validation."""
 
-    def __init__(self, auto_error: bool = True):
-        super().__init__(auto_error=auto_error)
+    def __init__(self, auto_error: bool = True, as_claims: bool = False):
+        super().__init__(auto_error=auto_error, as_claims=as_claims)
 
     async def __call__(self, request: Request):
         decoded_jwt = await super().__call__(request)
+        measure = config.metrics_sink.enabled
+        start = time.perf_counter() if measure else 0
+
         # Check admin role
-        if "ADMIN" not in decoded_jwt["roles"]:
+        if not has_roles(decoded_jwt, any_of=ADMIN_ROLES):
             raise_and_log_error(
-                logger, status.HTTP_403_FORBIDDEN, "Only admins can perform this action"
+                logger,
+                status.HTTP_403_FORBIDDEN,
+                "Only admins can perform this action",
+                reason="forbidden",
             )
+        if measure:
+            observe_stage("role", start)
         return decoded_jwt
 
 
+async def decode_bearer_token(encoded_token: str) -> dict:
+    """Select the key of a bearer token, verify it and check its issuer."""
+    measure = config.metrics_sink.enabled
+    start = time.perf_counter() if measure else 0
+
+    # Select key, issuer and algorithm
+    public_key, issuer, algorithms = await get_verification_parameters_for_token_async(
+        encoded_token
+    )
+    if measure:
+        start = observe_stage("key", start)
+
+    # Check if token is valid (outside the event loop if configured)
+    decoded_jwt = await run_verification(
+        validate_and_decode_token,
+        encoded_token=encoded_token,
+        public_key=public_key,
+        issuer=issuer,
+        algorithms=algorithms,
+    )
+    if measure:
+        start = observe_stage("signature", start)
+
+    # Check issuer
+    if decoded_jwt["iss"] != issuer:
+        raise_and_log_error(
+            logger, status.HTTP_401_UNAUTHORIZED, "Invalid JWT issuer.", reason="invalid_issuer"
+        )
+    if measure:
+        observe_stage("issuer", start)
+
+    return decoded_jwt
+
+
+def get_request_jwt(request: Request, encoded_token: str):
+    """Return the JWT decoded earlier in the request, if it was decoded from encoded_token."""
+    decoded = getattr(request.state, REQUEST_STATE_KEY, None)
+    if isinstance(decoded, tuple) and decoded[0] == encoded_token:
+        return decoded[1]
+    return None
+
+
+def set_request_jwt(request: Request, encoded_token: str, decoded_jwt):
+    """Store the decoded JWT so that other dependencies of the request reuse it."""
+    setattr(request.state, REQUEST_STATE_KEY, (encoded_token, decoded_jwt))
+
+
+ADMIN_ROLES = frozenset({"ADMIN"})
+
+jwt_bearer = JWTBearer()
+
+
+def has_roles(
+    decoded_jwt: dict, any_of: frozenset = frozenset(), all_of: frozenset = frozenset()
+) -> bool:
+    """Whether the JWT (dict or Claims) has at least one role of any_of and all of all_of."""
+    roles = decoded_jwt.get("roles") or ()
+    if isinstance(roles, str):
+        roles = (roles,)
+    if any_of and any_of.isdisjoint(roles):
+        return False
+    return not all_of or all_of.issubset(roles)
+
+
+def require_roles(any_of=(), all_of=(), predicate=None, bearer: JWTBearer = jwt_bearer):
+    """Return a dependency that checks the roles (and optionally other claims) of the JWT.
+
+    Role sets are built once, when the route is defined. The token is decoded by bearer
+    (the shared jwt_bearer by default), so FastAPI reuses the decoded JWT when several
+    dependencies of the same request depend on it. predicate, if given, receives the
+    decoded JWT and must return True to allow the request.
+    """
+    any_roles = frozenset(any_of)
+    all_roles = frozenset(all_of)
+
+    async def check_roles(decoded_jwt: dict = Depends(bearer)) -> dict:
+        measure = config.metrics_sink.enabled
+        start = time.perf_counter() if measure else 0
+
+        if not has_roles(decoded_jwt, any_roles, all_roles) or (
+            predicate is not None and not predicate(decoded_jwt)
+        ):
+            raise_and_log_error(
+                logger,
+                status.HTTP_403_FORBIDDEN,
+                "Not enough permissions to perform this action",
+                reason="forbidden",
+            )
+        if measure:
+            observe_stage("role", start)
+        return decoded_jwt
+
+    return check_roles
+
+
+def observe_stage(stage: str, start: float) -> float:
+    """Record the duration of an authentication stage and return the current time."""
+    now = time.perf_counter()
+    config.metrics_sink.observe(STAGE_SECONDS, now - start, {"stage": stage})
+    return now
+
+
+class LogRateLimiter:
+    """Allows each kind of log message at most once per interval."""
+
+    def __init__(self, interval: float = 0, maxsize: int = 1024, clock=time.monotonic):
+        self.interval = interval
+        self.maxsize = maxsize
+        self.clock = clock
+        self._last_logged = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key) -> tuple:
+        """Return whether a message of that kind can be logged and how many were skipped."""
+        if self.interval <= 0:
+            return True, 0
+
+        now = self.clock()
+        with self._lock:
+            last_logged = self._last_logged.get(key)
+            if last_logged is not None and now - last_logged < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False, 0
+
+            if len(self._last_logged) >= self.maxsize:
+                self._last_logged.clear()
+                self._suppressed.clear()
+            self._last_logged[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+
+log_rate_limiter = LogRateLimiter(interval=config.jwt_log_rate_limit_interval)
+
+
 def raise_and_log_error(
-    my_logger, status_code: int, message: str, message_to_log: str = None
+    my_logger,
+    status_code: int,
+    message: str,
+    message_to_log: str = None,
+    reason: str = None,
 ):
-    """Raises HTTPException and logs an error."""
+    """Raises HTTPException and logs an error.
+
+    Errors with the same logger, status code and message are logged at most once per
+    JWT_LOG_RATE_LIMIT_INTERVAL seconds (if set). If given, reason is counted in the
+    authentication failures metric.
+    """
 
     if message_to_log is None:
         message_to_log = message
 
-    my_logger.error(message_to_log)
+    if reason is not None:
+        config.metrics_sink.increment(FAILURES_TOTAL, {"reason": reason})
+
+    allowed, suppressed = log_rate_limiter.allow((my_logger.name, status_code, message))
+    if allowed:
+        if suppressed > 0:
+            message_to_log = f"{message_to_log} ({suppressed} similar errors suppressed)"
+        my_logger.error(message_to_log)
     raise HTTPException(status_code, message)
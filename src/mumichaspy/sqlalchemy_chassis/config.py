@@ -1,10 +1,43 @@
 import os
 
 
+def get_optional_env(name: str, cast):
+    """Get an environment variable converted with cast, or None if it is not set."""
+    value = os.getenv(name, "")
+    if value == "":
+        return None
+    if cast is bool:
+        return value.lower() in ("1", "true", "yes")
+    return cast(value)
+
+
 class Config:
     SQLALCHEMY_DATABASE_URL = os.getenv(
         "SQLALCHEMY_DATABASE_URL", "sqlite+aiosqlite:///./microservice.db"
     )
+    SQLALCHEMY_ECHO = get_optional_env("SQLALCHEMY_ECHO", bool) or False
+    SQLALCHEMY_PROFILE_QUERIES = get_optional_env("SQLALCHEMY_PROFILE_QUERIES", bool) or False
+    SQLALCHEMY_SLOW_QUERY_THRESHOLD = float(os.getenv("SQLALCHEMY_SLOW_QUERY_THRESHOLD", "0.5"))
+    # Pool settings, SQLAlchemy defaults are used for those not set
+    SQLALCHEMY_POOL_SIZE = get_optional_env("SQLALCHEMY_POOL_SIZE", int)
+    SQLALCHEMY_MAX_OVERFLOW = get_optional_env("SQLALCHEMY_MAX_OVERFLOW", int)
+    SQLALCHEMY_POOL_TIMEOUT = get_optional_env("SQLALCHEMY_POOL_TIMEOUT", float)
+    SQLALCHEMY_POOL_RECYCLE = get_optional_env("SQLALCHEMY_POOL_RECYCLE", int)
+    SQLALCHEMY_POOL_PRE_PING = get_optional_env("SQLALCHEMY_POOL_PRE_PING", bool)
+    SQLALCHEMY_POOL_USE_LIFO = get_optional_env("SQLALCHEMY_POOL_USE_LIFO", bool)
+    SQLALCHEMY_POOL_MONITOR = get_optional_env("SQLALCHEMY_POOL_MONITOR", bool) or False
+
+    def get_engine_options(self) -> dict:
+        """Get create_async_engine options for the pool settings that are set."""
+        options = {
+            "pool_size": self.SQLALCHEMY_POOL_SIZE,
+            "max_overflow": self.SQLALCHEMY_MAX_OVERFLOW,
+            "pool_timeout": self.SQLALCHEMY_POOL_TIMEOUT,
+            "pool_recycle": self.SQLALCHEMY_POOL_RECYCLE,
+            "pool_pre_ping": self.SQLALCHEMY_POOL_PRE_PING,
+            "pool_use_lifo": self.SQLALCHEMY_POOL_USE_LIFO,
+        }
+        return {name: value for name, value in options.items() if value is not None}
 
 
 config = Config()
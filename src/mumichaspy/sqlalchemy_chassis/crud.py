@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
 """CRUD helpers for SQLAlchemy."""
 
+from sqlalchemy import delete, insert, inspect, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.sql.selectable import Select
 from sqlalchemy.orm import DeclarativeMeta
-from typing import Type, Dict, Any, Optional
+from typing import Type, Dict, Any, List, Optional
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
 
 # Generic CRUD functions ##########################################################################
 # READ
@@ -51,9 +55,17 @@ async def get_first_statement_result(db: AsyncSession, stmt: Select):
 
 # DELETE
 async def delete_element_by_id(
-    db: AsyncSession, model: Type[DeclarativeMeta], element_id: Any
+    db: AsyncSession, model: Type[DeclarativeMeta], element_id: Any, materialize: bool = True
 ):
-    """Delete any DB element by id."""
+    """Delete any DB element by id, returning the deleted element (None if not found).
+
+    With materialize=False (opt-in), the element is not loaded: a single DELETE is run and
+    element_id is returned if it was deleted (None otherwise).
+    """
+    if not materialize:
+        deleted = await delete_elements(db, model, ids=[element_id])
+        return element_id if deleted else None
+
     element = await get_element_by_id(db, model, element_id)
     if element is not None:
         await db.delete(element)
@@ -61,6 +73,63 @@ async def delete_element_by_id(
     return element
 
 
+async def delete_elements(
+    db: AsyncSession,
+    model: Type[DeclarativeMeta],
+    filters: Optional[Dict[str, Any]] = None,
+    ids: Optional[List[Any]] = None,
+    return_ids: bool = False,
+    chunk_size: int = 1000,
+):
+    """Delete the rows matching filters (column: value) and/or ids without loading them.
+
+    Runs one DELETE (per chunk of ids) in a single transaction. Returns the number of
+    deleted rows or, with return_ids, their primary keys (tuples for composite keys), using
+    RETURNING where the dialect supports it. Returns None on error. Pass filters={} to
+    delete every row.
+    """
+    if filters is None and ids is None:
+        raise ValueError("Either filters or ids must be given")
+
+    clauses = get_filter_clauses(model, filters)
+    primary_key = inspect(model).primary_key
+    key = primary_key[0] if len(primary_key) == 1 else tuple_(*primary_key)
+    if ids is None:
+        where_chunks = [clauses]
+    else:
+        where_chunks = [
+            clauses + [key.in_(ids[start:start + chunk_size])]
+            for start in range(0, len(ids), chunk_size)
+        ]
+
+    returning = return_ids and db.get_bind().dialect.delete_returning
+    deleted_rows = 0
+    deleted_ids = []
+    try:
+        for where in where_chunks:
+            if return_ids and not returning:
+                result = await db.execute(select(*primary_key).where(*where))
+                deleted_ids.extend(result.all())
+            stmt = delete(model).where(*where).execution_options(synchronize_session=False)
+            if returning:
+                result = await db.execute(stmt.returning(*primary_key))
+                deleted_ids.extend(result.all())
+            else:
+                result = await db.execute(stmt)
+                deleted_rows += result.rowcount
+        await db.commit()
+    except Exception as exc:
+        logger.error(exc)
+        await db.rollback()
+        return None
+
+    if not return_ids:
+        return deleted_rows
+    if len(primary_key) == 1:
+        return [row[0] for row in deleted_ids]
+    return [tuple(row) for row in deleted_ids]
+
+
 # CREATE
 async def create_element(db: AsyncSession, db_element: Type[DeclarativeMeta]):
     """Insert a element in the database."""
@@ -76,6 +145,119 @@ async def create_element(db: AsyncSession, db_element: Type[DeclarativeMeta]):
     return db_element
 
 
+async def create_elements(
+    db: AsyncSession,
+    model: Type[DeclarativeMeta],
+    rows: List[Dict[str, Any]],
+    chunk_size: int = 1000,
+    return_ids: bool = False,
+):
+    """Insert many rows (dicts of column values) with one INSERT statement per chunk.
+
+    Each chunk is committed in its own transaction. Returns the number of inserted rows,
+    or their primary keys (in rows order) if return_ids is True. If a chunk fails, it is
+    rolled back (previous chunks remain) and None is returned.
+    """
+    primary_key = inspect(model).primary_key
+    stmt = insert(model)
+    if return_ids:
+        stmt = stmt.returning(*primary_key, sort_by_parameter_order=True)
+
+    ids = []
+    try:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            result = await db.execute(stmt, chunk)
+            if return_ids:
+                if len(primary_key) == 1:
+                    ids.extend(result.scalars().all())
+                else:
+                    ids.extend(tuple(row) for row in result.all())
+            await db.commit()
+    except Exception as exc:
+        logger.error(exc)
+        await db.rollback()
+        return None
+    return ids if return_ids else len(rows)
+
+
+# UPDATE
+async def update_elements(
+    db: AsyncSession,
+    model: Type[DeclarativeMeta],
+    filters: Dict[str, Any],
+    values: Dict[str, Any],
+):
+    """Update the rows matching filters (column: value) with a single UPDATE statement.
+
+    ORM objects are not loaded (nor synchronized). Returns the number of matched rows,
+    or None on error. An empty filters dict updates every row.
+    """
+    stmt = (
+        update(model)
+        .where(*get_filter_clauses(model, filters))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        result = await db.execute(stmt)
+        await db.commit()
+    except Exception as exc:
+        logger.error(exc)
+        await db.rollback()
+        return None
+    return result.rowcount
+
+
+async def upsert_elements(
+    db: AsyncSession,
+    model: Type[DeclarativeMeta],
+    rows: List[Dict[str, Any]],
+    index_elements: Optional[List[str]] = None,
+    update_columns: Optional[List[str]] = None,
+    chunk_size: int = 500,
+):
+    """Insert rows, updating existing ones (INSERT ... ON CONFLICT DO UPDATE).
+
+    Conflicts are detected on index_elements (primary key by default) and update_columns
+    (every other column of the rows by default) are updated; if there are none, existing
+    rows are left as they are. Returns the number of inserted or updated rows, or None on
+    error. Only SQLite and PostgreSQL are supported; other dialects raise ValueError.
+    """
+    if not rows:
+        return 0
+
+    dialect_name = db.get_bind().dialect.name
+    dialect_insert = UPSERT_INSERTS.get(dialect_name)
+    if dialect_insert is None:
+        raise ValueError(f"Dialect {dialect_name} not supported by upsert_elements")
+
+    if index_elements is None:
+        index_elements = [column.key for column in inspect(model).primary_key]
+    if update_columns is None:
+        update_columns = [column for column in rows[0] if column not in index_elements]
+
+    affected_rows = 0
+    try:
+        for start in range(0, len(rows), chunk_size):
+            stmt = dialect_insert(model).values(rows[start:start + chunk_size])
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={column: stmt.excluded[column] for column in update_columns},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+            result = await db.execute(stmt.execution_options(synchronize_session=False))
+            affected_rows += result.rowcount
+            await db.commit()
+    except Exception as exc:
+        logger.error(exc)
+        await db.rollback()
+        return None
+    return affected_rows
+
+
 # Optional parameters #############################################################################
 def set_order_by_to_statement(
     stmt: Select, model: Type[DeclarativeMeta], order_by: Optional[str]
@@ -103,6 +285,20 @@ def add_options_to_statement(
     return stmt
 
 
+def get_filter_clauses(model, filters: Optional[Dict[str, Any]]) -> list:
+    """Get column == value clauses for filters, for statements that modify data.
+
+    Unlike set_filters_to_statement, unknown columns raise ValueError instead of being
+    ignored, since ignoring them would widen the statement.
+    """
+    clauses = []
+    for column, value in (filters or {}).items():
+        if not hasattr(model, column):
+            raise ValueError(f"Column {column} not found in model {model.__name__}")
+        clauses.append(getattr(model, column) == value)
+    return clauses
+
+
 def set_filters_to_statement(stmt: Select, model, filters: dict) -> Select:
     """Adds filters to given statement if needed."""
     if filters is None:
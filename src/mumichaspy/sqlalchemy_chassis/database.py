@@ -1,22 +1,94 @@
 # -*- coding: utf-8 -*-
-"""Dependencies for dependency injection."""
+"""Dependencies for dependency injection.
+
+The engine and session factory are created on first use (or by calling init), so
+importing this module does not touch the database.
+"""
 
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from mumichaspy.sqlalchemy_chassis.config import config
+from mumichaspy.sqlalchemy_chassis.pool import PoolMonitor
+from mumichaspy.sqlalchemy_chassis.profiler import QueryProfiler
 
-engine = create_async_engine(config.SQLALCHEMY_DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, future=True
-)
+_engine = None
+_session_local = None
+_pool_monitor = None
+_query_profiler = None
 
 Base = declarative_base()
 
 
+def create_engine(database_url: str = None, **engine_options):
+    """Create an async engine with the configured pool settings.
+
+    engine_options override the settings of config.
+    """
+    if database_url is None:
+        database_url = config.SQLALCHEMY_DATABASE_URL
+    engine_options = {**config.get_engine_options(), **engine_options}
+    engine_options.setdefault("echo", config.SQLALCHEMY_ECHO)
+    return create_async_engine(database_url, **engine_options)
+
+
+def init(database_url: str = None, **engine_options):
+    """Create the engine and session factory, replacing existing ones."""
+    global _engine, _session_local, _pool_monitor, _query_profiler
+
+    _engine = create_engine(database_url, **engine_options)
+    _pool_monitor = PoolMonitor(_engine) if config.SQLALCHEMY_POOL_MONITOR else None
+    _query_profiler = None
+    if config.SQLALCHEMY_PROFILE_QUERIES:
+        _query_profiler = QueryProfiler(_engine, config.SQLALCHEMY_SLOW_QUERY_THRESHOLD)
+    _session_local = sessionmaker(
+        autocommit=False, autoflush=False, bind=_engine, class_=AsyncSession, future=True
+    )
+    return _engine
+
+
+def get_engine():
+    """Get engine, creating it if needed."""
+    if _engine is None:
+        init()
+    return _engine
+
+
+def get_session_local():
+    """Get session factory, creating it if needed."""
+    if _session_local is None:
+        init()
+    return _session_local
+
+
+def get_pool_stats():
+    """Get connection pool statistics, or None if SQLALCHEMY_POOL_MONITOR is not enabled."""
+    get_engine()
+    if _pool_monitor is None:
+        return None
+    return _pool_monitor.stats()
+
+
+def get_query_stats():
+    """Get per statement aggregates, or None if SQLALCHEMY_PROFILE_QUERIES is not enabled."""
+    get_engine()
+    if _query_profiler is None:
+        return None
+    return _query_profiler.dump()
+
+
+def __getattr__(name):
+    """Keep ```engine``` and ```SessionLocal``` module attributes, created lazily."""
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_local()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 async def get_db():
     """Get database."""
 
-    db = SessionLocal()
+    db = get_session_local()()
     try:
         yield db
         await db.commit()
@@ -0,0 +1,89 @@
+"""Observability of the connection pool: checkout wait times and saturation."""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor:
+    """Collects checkout statistics of the connection pool of an (async) engine.
+
+    SQLAlchemy has no event before a checkout starts waiting, so the wait is measured by
+    wrapping the connect method of the pool (again whenever the engine is disposed).
+    """
+
+    def __init__(self, engine, clock=time.perf_counter):
+        self.sync_engine = getattr(engine, "sync_engine", engine)
+        self.clock = clock
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+        self._wrap_pool()
+        event.listen(self.sync_engine, "engine_disposed", self._on_engine_disposed)
+
+    def _wrap_pool(self):
+        pool = self.sync_engine.pool
+        connect = pool.connect
+
+        def timed_connect():
+            start = self.clock()
+            try:
+                connection = connect()
+            except PoolTimeoutError as e:
+                with self._lock:
+                    self.timeouts += 1
+                logger.warning("Connection pool exhausted: " + str(e))
+                raise
+            self._record_checkout(self.clock() - start, pool)
+            return connection
+
+        pool.connect = timed_connect
+
+    def _on_engine_disposed(self, connection_or_engine):
+        self._wrap_pool()
+
+    def _record_checkout(self, wait: float, pool):
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def stats(self) -> dict:
+        """Return checkout counters, wait times and current pool usage.
+
+        saturation is the fraction of the pool capacity (size plus max overflow) in use;
+        it is None for pools without a fixed capacity.
+        """
+        pool = self.sync_engine.pool
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": (
+                    self.wait_seconds_total / self.checkouts if self.checkouts > 0 else 0.0
+                ),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+        stats["saturation"] = None
+        if hasattr(pool, "checkedout"):
+            stats["size"] = pool.size()
+            stats["checked_out"] = pool.checkedout()
+            stats["overflow"] = pool.overflow()
+            max_overflow = getattr(pool, "_max_overflow", 0)
+            capacity = pool.size() + max_overflow
+            if max_overflow >= 0 and capacity > 0:
+                stats["saturation"] = stats["checked_out"] / capacity
+        return stats
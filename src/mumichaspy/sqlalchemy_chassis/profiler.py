@@ -0,0 +1,115 @@
+"""Query profiler based on engine events: aggregates per statement and slow queries."""
+
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_REGEX = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_REGEX = re.compile(r"%\([^)]*\)s|%s|:\w+|\$\d+|\?")
+PLACEHOLDER_LIST_REGEX = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint_statement(statement: str) -> str:
+    """Return the statement with literals and bound parameters replaced by ?."""
+    fingerprint = STRING_LITERAL_REGEX.sub("?", statement)
+    fingerprint = PLACEHOLDER_REGEX.sub("?", fingerprint)
+    fingerprint = NUMBER_LITERAL_REGEX.sub("?", fingerprint)
+    fingerprint = PLACEHOLDER_LIST_REGEX.sub("(...)", fingerprint)
+    return WHITESPACE_REGEX.sub(" ", fingerprint).strip()
+
+
+class QueryProfiler:
+    """Aggregates count and latency of the statements run by an (async) engine.
+
+    Statements slower than slow_query_threshold seconds are logged as warnings, with
+    duration and fingerprint in the extra fields of the log record.
+    """
+
+    def __init__(
+        self,
+        engine,
+        slow_query_threshold: float = 0.5,
+        max_fingerprints: int = 1000,
+        clock=time.perf_counter,
+    ):
+        self.sync_engine = getattr(engine, "sync_engine", engine)
+        self.slow_query_threshold = slow_query_threshold
+        self.max_fingerprints = max_fingerprints
+        self.clock = clock
+        self._aggregates = {}
+        self._lock = threading.Lock()
+        event.listen(self.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(self.sync_engine, "handle_error", self._handle_error)
+
+    def detach(self):
+        """Stop profiling the engine."""
+        event.remove(self.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(self.sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(self.clock())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_times")
+        if not start_times:
+            return
+        duration = self.clock() - start_times.pop()
+        self.record(statement, duration)
+
+    def _handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_times"):
+            connection.info["query_start_times"].pop()
+
+    def record(self, statement: str, duration: float):
+        """Add a statement execution to the aggregates of its fingerprint."""
+        fingerprint = fingerprint_statement(statement)
+        with self._lock:
+            key = fingerprint
+            if key not in self._aggregates and len(self._aggregates) >= self.max_fingerprints:
+                key = "(other)"
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = [0, 0.0, 0.0]
+            aggregate[0] += 1
+            aggregate[1] += duration
+            aggregate[2] = max(aggregate[2], duration)
+
+        if duration >= self.slow_query_threshold:
+            logger.warning(
+                "Slow query (%.3f s): %s",
+                duration,
+                fingerprint,
+                extra={"duration": duration, "fingerprint": fingerprint},
+            )
+
+    def dump(self) -> list:
+        """Return the aggregates of every fingerprint, slowest (total time) first."""
+        with self._lock:
+            aggregates = [
+                {
+                    "fingerprint": fingerprint,
+                    "count": count,
+                    "total_seconds": total,
+                    "avg_seconds": total / count,
+                    "max_seconds": maximum,
+                }
+                for fingerprint, (count, total, maximum) in self._aggregates.items()
+            ]
+        return sorted(aggregates, key=lambda aggregate: aggregate["total_seconds"], reverse=True)
+
+    def reset(self):
+        """Forget every aggregate."""
+        with self._lock:
+            self._aggregates.clear()
@@ -0,0 +1,118 @@
+from mumichaspy.fastapi_jwt_chassis.cache import TokenCache, token_digest
+from mumichaspy.fastapi_jwt_chassis.time import FrozenClock
+
+
+def test_token_digest_is_stable():
+    assert token_digest("abc") == token_digest("abc")
+    assert token_digest("abc") != token_digest("abd")
+
+
+def test_token_cache_hit_and_miss():
+    # Arrange
+    cache = TokenCache(maxsize=10, ttl=60, clock=FrozenClock(1000.0))
+    claims = {"sub": "1", "exp": 2000}
+
+    # Act
+    first = cache.get("token")
+    cache.set("token", claims)
+    second = cache.get("token")
+
+    # Assert
+    assert first is None
+    assert second == claims
+    assert second is not claims
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 10}
+
+
+def test_token_cache_ttl_capped_at_exp():
+    # Arrange
+    clock = FrozenClock(1000)
+    cache = TokenCache(maxsize=10, ttl=600, clock=clock)
+    cache.set("token", {"exp": 1010})
+
+    # Act
+    clock.now = 1009
+    before_exp = cache.get("token")
+    clock.now = 1010
+    after_exp = cache.get("token")
+
+    # Assert
+    assert before_exp is not None
+    assert after_exp is None
+    assert len(cache) == 0
+
+
+def test_token_cache_expires_one_tick_before_exp():
+    # Arrange
+    clock = FrozenClock(1000)
+    clock.tick = 1
+    cache = TokenCache(maxsize=10, ttl=600, clock=clock)
+    cache.set("token", {"exp": 1010})
+
+    # Act
+    clock.now = 1009
+    result = cache.get("token")
+
+    # Assert
+    assert result is None
+
+
+def test_token_cache_ttl_expiration():
+    # Arrange
+    clock = FrozenClock(1000)
+    cache = TokenCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("token", {"exp": 5000})
+
+    # Act
+    clock.now = 1006
+    result = cache.get("token")
+
+    # Assert
+    assert result is None
+
+
+def test_token_cache_lru_eviction():
+    # Arrange
+    cache = TokenCache(maxsize=2, ttl=60, clock=FrozenClock(1000.0))
+    cache.set("a", {"sub": "a"})
+    cache.set("b", {"sub": "b"})
+
+    # Act
+    cache.get("a")
+    cache.set("c", {"sub": "c"})
+
+    # Assert
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_token_cache_context_mismatch():
+    # Arrange
+    cache = TokenCache(maxsize=10, ttl=60, clock=FrozenClock(1000.0))
+    cache.set("token", {"sub": "1"}, context=("old-key", "iss", ("RS256",)))
+
+    # Act
+    result = cache.get("token", context=("new-key", "iss", ("RS256",)))
+
+    # Assert
+    assert result is None
+    assert len(cache) == 0
+
+
+def test_token_cache_disabled():
+    assert not TokenCache(maxsize=0).enabled
+    assert not TokenCache(ttl=0).enabled
+    assert TokenCache().enabled
+
+
+def test_token_cache_clear():
+    # Arrange
+    cache = TokenCache(maxsize=10, ttl=60, clock=FrozenClock(1000.0))
+    cache.set("token", {"sub": "1"})
+
+    # Act
+    cache.clear()
+
+    # Assert
+    assert cache.get("token") is None
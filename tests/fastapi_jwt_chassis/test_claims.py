@@ -0,0 +1,74 @@
+import pytest
+
+from mumichaspy.fastapi_jwt_chassis.claims import Claims
+from mumichaspy.fastapi_jwt_chassis.mocks import DECODED_MOCK_JWT
+
+
+def test_claims_from_dict():
+    # Arrange
+    decoded_jwt = {**DECODED_MOCK_JWT, "exp": 2000, "iat": 1000}
+
+    # Act
+    claims = Claims.from_dict(decoded_jwt)
+
+    # Assert
+    assert claims.sub == DECODED_MOCK_JWT["sub"]
+    assert claims.iss == DECODED_MOCK_JWT["iss"]
+    assert claims.email == DECODED_MOCK_JWT["email"]
+    assert claims.exp == 2000
+    assert claims.iat == 1000
+    assert claims.roles == frozenset(DECODED_MOCK_JWT["roles"])
+    assert claims.extra == {"username": "jdoe", "is_active": True}
+
+
+def test_claims_item_access():
+    # Arrange
+    claims = Claims.from_dict(DECODED_MOCK_JWT)
+
+    # Act & Assert
+    assert claims["iss"] == DECODED_MOCK_JWT["iss"]
+    assert claims["username"] == "jdoe"
+    assert claims.get("exp") is None
+    assert claims.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        claims["exp"]
+
+
+def test_claims_roles():
+    # Arrange
+    claims = Claims(roles=["ADMIN", "USER"])
+
+    # Act & Assert
+    assert claims.has_role("ADMIN")
+    assert not claims.has_role("EDITOR")
+    assert Claims().roles == frozenset()
+
+
+def test_claims_single_role_string():
+    # Arrange
+    claims = Claims.from_dict({"roles": "admin"})
+
+    # Act & Assert
+    assert claims.roles == frozenset({"admin"})
+    assert not claims.has_role("a")
+
+
+def test_claims_to_dict():
+    # Arrange
+    decoded_jwt = {**DECODED_MOCK_JWT, "exp": 2000, "iat": 1000}
+
+    # Act
+    result = Claims.from_dict(decoded_jwt).to_dict()
+
+    # Assert
+    assert result == decoded_jwt
+
+
+def test_claims_slots():
+    # Arrange
+    claims = Claims()
+
+    # Act & Assert
+    assert not hasattr(claims, "__dict__")
+    with pytest.raises(AttributeError):
+        claims.other = 1
@@ -1,15 +1,34 @@
 import os
+import asyncio
+import subprocess
+import sys
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase, mock
 import tempfile
+import jwt
+import pytest
 from mumichaspy.fastapi_jwt_chassis.config import (
     Config,
+    Verifier,
+    config,
+    init,
+    lifespan,
+    get_public_key_async,
     get_public_key_from_url,
+    get_public_key_from_url_async,
     get_public_key_from_file,
     write_public_key_to_file,
     get_public_key,
+    get_shared_public_key,
+    get_shared_public_key_async,
+    load_public_key,
 )
+from mumichaspy.fastapi_jwt_chassis.key_file import get_key_file_mtime
+from mumichaspy.fastapi_jwt_chassis.metrics import PrometheusMetricsSink
 from mumichaspy.fastapi_jwt_chassis.mocks import TESTING_PUBLIC_KEY
+from mumichaspy.fastapi_jwt_chassis.testing_issuer import PUBLIC_KEY_PATH, IssuerStandIn
 
 
 # get_public_key_from_url #########################################################################
@@ -59,6 +78,74 @@ def test_get_public_key_from_url_no_url(mock_get):
     assert public_key is None
 
 
+# get_public_key_from_url_async ###################################################################
+@pytest.mark.asyncio
+@mock.patch("httpx.AsyncClient.get")
+async def test_get_public_key_from_url_async_ok(mock_get):
+    # Arrange
+    mock_response = mock.Mock()
+    mock_response.status_code = 200
+    mock_response.text = TESTING_PUBLIC_KEY
+    mock_get.return_value = mock_response
+    url = "https://example.com/public_key"
+
+    # Act
+    public_key = await get_public_key_from_url_async(url)
+
+    # Assert
+    mock_get.assert_called_once_with(url)
+    assert public_key == TESTING_PUBLIC_KEY
+
+
+@pytest.mark.asyncio
+@mock.patch("asyncio.sleep")
+@mock.patch("httpx.AsyncClient.get")
+async def test_get_public_key_from_url_async_retries(mock_get, mock_sleep):
+    # Arrange
+    error_response = mock.Mock()
+    error_response.status_code = 503
+    ok_response = mock.Mock()
+    ok_response.status_code = 200
+    ok_response.text = TESTING_PUBLIC_KEY
+    mock_get.side_effect = [error_response, Exception("timeout"), ok_response]
+    url = "https://example.com/public_key"
+
+    # Act
+    public_key = await get_public_key_from_url_async(url, retries=3)
+
+    # Assert
+    assert mock_get.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert public_key == TESTING_PUBLIC_KEY
+
+
+@pytest.mark.asyncio
+@mock.patch("asyncio.sleep")
+@mock.patch("httpx.AsyncClient.get")
+async def test_get_public_key_from_url_async_error(mock_get, mock_sleep):
+    # Arrange
+    mock_get.side_effect = Exception("connection refused")
+    url = "https://example.com/public_key"
+
+    # Act
+    public_key = await get_public_key_from_url_async(url, retries=2)
+
+    # Assert
+    assert mock_get.call_count == 3
+    assert public_key is None
+
+
+@pytest.mark.asyncio
+@mock.patch("httpx.AsyncClient.get")
+async def test_get_public_key_from_url_async_no_url(mock_get):
+    # Act
+    public_key = await get_public_key_from_url_async("")
+
+    # Assert
+    mock_get.assert_not_called()
+    assert public_key is None
+
+
 # get_public_key_from_file ########################################################################
 def test_update_public_key_from_file_ok():
     # Arrange
@@ -108,6 +195,90 @@ def test_write_public_key_to_file_ok():
     os.remove(public_key_file_name)
 
 
+# get_shared_public_key ###########################################################################
+def test_get_shared_public_key_fetched_once(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    with IssuerStandIn(latency=0.05) as issuer:
+        url = issuer.url + PUBLIC_KEY_PATH
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            # Act
+            public_keys = list(
+                executor.map(
+                    lambda _: get_shared_public_key(url, file_path, 60, "RS256"), range(8)
+                )
+            )
+
+    # Assert
+    assert public_keys == [TESTING_PUBLIC_KEY] * 8
+    assert issuer.requests[PUBLIC_KEY_PATH] == 1
+
+
+def test_get_shared_public_key_stale_file(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+    write_public_key_to_file("stale key", file_path)
+    os.utime(file_path, (0, 0))
+
+    # Act
+    with IssuerStandIn() as issuer:
+        public_key = get_shared_public_key(issuer.url + PUBLIC_KEY_PATH, file_path, 60, "RS256")
+
+    # Assert
+    assert public_key == TESTING_PUBLIC_KEY
+    assert get_public_key_from_file(file_path) == TESTING_PUBLIC_KEY
+
+
+def test_get_shared_public_key_stale_file_same_key(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+    write_public_key_to_file(TESTING_PUBLIC_KEY, file_path)
+    os.utime(file_path, (0, 0))
+
+    # Act
+    with IssuerStandIn() as issuer:
+        url = issuer.url + PUBLIC_KEY_PATH
+        public_keys = [get_shared_public_key(url, file_path, 60, "RS256") for _ in range(5)]
+
+    # Assert
+    assert public_keys == [TESTING_PUBLIC_KEY] * 5
+    assert issuer.requests[PUBLIC_KEY_PATH] == 1
+
+
+def test_get_shared_public_key_invalid_key_not_shared(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    # Act
+    with mock.patch(
+        "mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_url", return_value="invalid"
+    ):
+        public_key = get_shared_public_key("https://example.com", file_path, 60, "RS256")
+
+    # Assert
+    assert public_key == "invalid"
+    assert not os.path.exists(file_path)
+
+
+@pytest.mark.asyncio
+async def test_get_shared_public_key_async_fetched_once(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    with IssuerStandIn(latency=0.05) as issuer:
+        url = issuer.url + PUBLIC_KEY_PATH
+
+        # Act
+        public_keys = await asyncio.gather(
+            *(get_shared_public_key_async(url, file_path, 60, "RS256") for _ in range(4))
+        )
+
+    # Assert
+    assert public_keys == [TESTING_PUBLIC_KEY] * 4
+    assert issuer.requests[PUBLIC_KEY_PATH] == 1
+
+
 # get_public_key ##################################################################################
 @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_file")
 @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_url")
@@ -175,6 +346,153 @@ def test_get_public_key_ok_public_file(mock_from_url, mock_from_file):
     assert result == TESTING_PUBLIC_KEY
 
 
+# load_public_key #################################################################################
+def test_load_public_key_ok():
+    # Act
+    key_object = load_public_key(TESTING_PUBLIC_KEY, "RS256")
+
+    # Assert
+    assert key_object.key_size == 1024
+
+
+def test_load_public_key_invalid_key():
+    with pytest.raises(Exception):
+        load_public_key("not a key", "RS256")
+
+
+def test_load_public_key_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        load_public_key(TESTING_PUBLIC_KEY, "XX999")
+
+
+# get_public_key_async ############################################################################
+@pytest.mark.asyncio
+@mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_file")
+@mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_url_async")
+async def test_get_public_key_async_file_fallback(mock_from_url, mock_from_file):
+    # Arrange
+    public_key_url = "https://example.com/public_key"
+    public_key_file_path = f"{uuid.uuid4().hex}.pem"
+    mock_from_url.return_value = None
+    mock_from_file.return_value = TESTING_PUBLIC_KEY
+
+    # Act
+    result = await get_public_key_async(None, public_key_url, public_key_file_path, retries=1)
+
+    # Assert
+    mock_from_url.assert_called_once_with(public_key_url, retries=1)
+    mock_from_file.assert_called_once_with(public_key_file_path)
+    assert result == TESTING_PUBLIC_KEY
+
+
+# import side effects ############################################################################
+def test_import_has_no_side_effects(tmp_path):
+    # Arrange
+    public_key_file_path = tmp_path / "public_key.pem"
+    env = {
+        **os.environ,
+        "PUBLIC_KEY_URL": "http://127.0.0.1:9/public_key",
+        "PUBLIC_KEY_FILE_PATH": str(public_key_file_path),
+    }
+    code = (
+        "import httpx;"
+        "httpx.Client.get = httpx.AsyncClient.get = None;"
+        "from mumichaspy.fastapi_jwt_chassis import validation, mocks;"
+        "from mumichaspy.fastapi_jwt_chassis.config import config;"
+        "assert not config._public_key_loaded"
+    )
+
+    # Act
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    # Assert
+    assert not public_key_file_path.exists()
+
+
+# init ############################################################################################
+@mock.patch.object(config.key_store, "refresh")
+@mock.patch.object(config, "update_public_key")
+def test_init(mock_update, mock_refresh):
+    # Act
+    with mock.patch.object(config.key_store, "jwks_url", "https://example.com/jwks"):
+        init()
+
+    # Assert
+    mock_update.assert_called_once()
+    mock_refresh.assert_called_once()
+
+
+# lifespan ########################################################################################
+@pytest.mark.asyncio
+@mock.patch.object(config.key_store, "stop_background_refresh")
+@mock.patch.object(config.key_store, "start_background_refresh")
+@mock.patch.object(config.key_store, "refresh_async")
+@mock.patch.object(config, "update_public_key_async")
+async def test_lifespan(mock_update, mock_refresh, mock_start, mock_stop):
+    # Act
+    with mock.patch.object(config.key_store, "jwks_url", "https://example.com/jwks"):
+        async with lifespan():
+            mock_stop.assert_not_called()
+
+    # Assert
+    mock_update.assert_awaited_once()
+    mock_refresh.assert_awaited_once()
+    mock_start.assert_called_once()
+    mock_stop.assert_called_once()
+
+
+# Verifier ########################################################################################
+def get_ed25519_keys():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    private_key = Ed25519PrivateKey.generate()
+    public_key = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_key, public_key.decode()
+
+
+def test_verifier_hs256_ok():
+    # Arrange
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    encoded_token = jwt.encode({"iss": "internal", "sub": "1"}, "shared-secret", algorithm="HS256")
+
+    # Act
+    result = verifier.verify(encoded_token)
+
+    # Assert
+    assert result == {"iss": "internal", "sub": "1"}
+
+
+def test_verifier_eddsa_ok():
+    # Arrange
+    private_key, public_key = get_ed25519_keys()
+    verifier = Verifier("internal", public_key, "EdDSA")
+    encoded_token = jwt.encode({"iss": "internal", "sub": "1"}, private_key, algorithm="EdDSA")
+
+    # Act
+    result = verifier.verify(encoded_token)
+
+    # Assert
+    assert result == {"iss": "internal", "sub": "1"}
+
+
+def test_verifier_rejects_other_algorithm():
+    # Arrange
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    encoded_token = jwt.encode({"iss": "internal"}, "shared-secret", algorithm="HS512")
+
+    # Act
+    with pytest.raises(jwt.exceptions.InvalidAlgorithmError):
+        verifier.verify(encoded_token)
+
+
+def test_verifier_rejects_public_key_as_secret():
+    with pytest.raises(jwt.exceptions.InvalidKeyError):
+        Verifier("internal", TESTING_PUBLIC_KEY, "HS256")
+
+
 class TestConfig(TestCase):
     url = "https://test.com/public_key"
     issuer = "test-issuer"
@@ -264,6 +582,23 @@ class TestConfig(TestCase):
         assert self.config.public_key == TESTING_PUBLIC_KEY
         assert self.config.public_key_file_path == self.file_path
 
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
+    def test_update_public_key_clears_token_cache(
+        self, mock_get_public_key, mock_write_public_key
+    ):
+        # Arrange
+        self.config.public_key = "old key"
+        self.config.token_cache.maxsize = 10
+        self.config.token_cache.set("token", {"sub": "1"})
+        mock_get_public_key.return_value = TESTING_PUBLIC_KEY
+
+        # Act
+        self.config.update_public_key()
+
+        # Assert
+        assert len(self.config.token_cache) == 0
+
     @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
     @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
     def test_update_public_key_error(self, mock_get_public_key, mock_write_public_key):
@@ -280,3 +615,218 @@ class TestConfig(TestCase):
         mock_get_public_key.assert_called_once_with(None, self.url, self.file_path)
         mock_write_public_key.assert_not_called()
         assert self.config.public_key is None
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
+    def test_update_public_key_invalid_key(
+        self, mock_get_public_key, mock_write_public_key
+    ):
+        # Arrange
+        self.config.public_key = TESTING_PUBLIC_KEY
+        mock_get_public_key.return_value = "not a key"
+
+        # Act
+        self.config.update_public_key()
+
+        # Assert
+        mock_write_public_key.assert_not_called()
+        assert self.config.public_key == TESTING_PUBLIC_KEY
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.load_public_key", wraps=load_public_key)
+    def test_public_key_object_parsed_once(self, mock_load_public_key):
+        # Arrange
+        self.config.public_key = TESTING_PUBLIC_KEY
+
+        # Act
+        first = self.config.public_key_object
+        second = self.config.public_key_object
+
+        # Assert
+        mock_load_public_key.assert_called_once_with(TESTING_PUBLIC_KEY, self.config.jwt_algorithm)
+        assert first is second
+
+    def test_public_key_object_no_key(self):
+        # Arrange
+        self.config.public_key = None
+
+        # Assert
+        assert self.config.public_key_object is None
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
+    def test_init_does_not_load_public_key(self, mock_get_public_key):
+        # Act
+        Config()
+
+        # Assert
+        mock_get_public_key.assert_not_called()
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
+    def test_public_key_loaded_on_first_access(
+        self, mock_get_public_key, mock_write_public_key
+    ):
+        # Arrange
+        new_config = Config()
+        mock_get_public_key.return_value = TESTING_PUBLIC_KEY
+
+        # Act
+        first = new_config.public_key
+        second = new_config.public_key
+
+        # Assert
+        mock_get_public_key.assert_called_once()
+        assert first == second == TESTING_PUBLIC_KEY
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_async")
+    def test_update_public_key_async_ok(self, mock_get_public_key, mock_write_public_key):
+        # Arrange
+        self.config.public_key_url = self.url
+        self.config.public_key_file_path = self.file_path
+        mock_get_public_key.return_value = TESTING_PUBLIC_KEY
+
+        # Act
+        asyncio.run(self.config.update_public_key_async())
+
+        # Assert
+        mock_get_public_key.assert_awaited_once_with(
+            None,
+            self.url,
+            self.file_path,
+            connect_timeout=self.config.public_key_connect_timeout,
+            read_timeout=self.config.public_key_read_timeout,
+            retries=self.config.public_key_retries,
+        )
+        mock_write_public_key.assert_called_once_with(TESTING_PUBLIC_KEY, self.file_path)
+        assert self.config.public_key == TESTING_PUBLIC_KEY
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.write_public_key_to_file")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key")
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_async")
+    def test_ensure_public_key_async_loads_once(
+        self, mock_get_public_key_async, mock_get_public_key, mock_write_public_key
+    ):
+        # Arrange
+        new_config = Config()
+
+        async def get_public_key_async(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return TESTING_PUBLIC_KEY
+
+        mock_get_public_key_async.side_effect = get_public_key_async
+
+        async def ensure_public_key_concurrently():
+            await asyncio.gather(*(new_config.ensure_public_key_async() for _ in range(3)))
+
+        # Act
+        asyncio.run(ensure_public_key_concurrently())
+
+        # Assert
+        mock_get_public_key_async.assert_awaited_once()
+        mock_get_public_key.assert_not_called()
+        assert new_config.public_key == TESTING_PUBLIC_KEY
+
+    def test_reload_public_key_file(self):
+        # Arrange
+        other_issuer = IssuerStandIn(key_size=1024)
+        other_issuer.rotate_key()
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "public_key.pem")
+            test_config = Config()
+            test_config.public_key_file_path = file_path
+            test_config.public_key_file_max_age = 60
+            test_config.update_public_key(public_key=TESTING_PUBLIC_KEY)
+
+            # Act
+            with open(file_path, "w") as f:
+                f.write(other_issuer.public_key)
+            os.utime(file_path, (0, 0))
+            test_config._public_key_file_checked_at = 0.0
+            key_object = test_config.public_key_object
+
+        # Assert
+        assert test_config.public_key == other_issuer.public_key
+        assert key_object is test_config.public_key_object
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_url")
+    def test_public_key_object_stale_key_file_on_first_use(self, mock_from_url):
+        # Arrange
+        mock_from_url.return_value = TESTING_PUBLIC_KEY
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "public_key.pem")
+            write_public_key_to_file(TESTING_PUBLIC_KEY, file_path)
+            stale_mtime = time.time() - 3600
+            os.utime(file_path, (stale_mtime, stale_mtime))
+            test_config = Config()
+            test_config.public_key_url = self.url
+            test_config.public_key_file_path = file_path
+            test_config.public_key_file_max_age = 60
+
+            # Act
+            key_object = test_config.public_key_object
+            mtime = get_key_file_mtime(file_path)
+
+        # Assert
+        mock_from_url.assert_called_once_with(self.url)
+        assert key_object is not None
+        assert mtime > stale_mtime
+
+    @mock.patch("mumichaspy.fastapi_jwt_chassis.config.get_public_key_from_url")
+    def test_public_key_object_stale_key_file_fetch_failed(self, mock_from_url):
+        # Arrange
+        mock_from_url.return_value = None
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "public_key.pem")
+            write_public_key_to_file(TESTING_PUBLIC_KEY, file_path)
+            os.utime(file_path, (0, 0))
+            test_config = Config()
+            test_config.public_key_url = self.url
+            test_config.public_key_file_path = file_path
+            test_config.public_key_file_max_age = 60
+
+            # Act
+            public_key = test_config.public_key
+            mtime = get_key_file_mtime(file_path)
+
+        # Assert
+        mock_from_url.assert_called_once_with(self.url)
+        assert public_key == TESTING_PUBLIC_KEY
+        assert mtime == 0
+
+    @mock.patch.object(Config, "jwt_verification_mode", "threads")
+    def test_init_unknown_verification_mode(self):
+        # Act
+        with self.assertLogs("mumichaspy.fastapi_jwt_chassis.config", level="ERROR") as logs:
+            new_config = Config()
+
+        # Assert
+        assert new_config.jwt_verification_mode == "inline"
+        assert "threads" in logs.output[0]
+
+    def test_register_verifier(self):
+        # Act
+        verifier = self.config.register_verifier("internal", "shared-secret", "HS256")
+
+        # Assert
+        assert self.config.verifiers == {"internal": verifier}
+        assert verifier.key == b"shared-secret"
+
+    @mock.patch.object(Config, "jwt_internal_key", "shared-secret")
+    @mock.patch.object(Config, "jwt_internal_issuer", "internal")
+    def test_init_registers_internal_verifier(self):
+        # Act
+        new_config = Config()
+
+        # Assert
+        assert new_config.verifiers["internal"].algorithm == Config.jwt_internal_algorithm
+
+    def test_set_metrics_sink(self):
+        # Arrange
+        sink = PrometheusMetricsSink()
+
+        # Act
+        self.config.set_metrics_sink(sink)
+
+        # Assert
+        assert self.config.metrics_sink is sink
+        assert 'jwt_cache_size{cache="token"} 0' in sink.render()
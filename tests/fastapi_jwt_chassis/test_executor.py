@@ -0,0 +1,148 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from mumichaspy.fastapi_jwt_chassis.config import config, load_public_key
+from mumichaspy.fastapi_jwt_chassis import executor
+from mumichaspy.fastapi_jwt_chassis.executor import (
+    decode_in_process,
+    offload_token,
+    run_verification,
+    serialize_public_key,
+    shutdown_executors,
+)
+from mumichaspy.fastapi_jwt_chassis.mocks import (
+    DECODED_MOCK_JWT,
+    TESTING_PUBLIC_KEY,
+    get_encoded_mock_jwt,
+)
+from mumichaspy.fastapi_jwt_chassis.validation import validate_and_decode_token
+
+
+def current_thread_name(encoded_token):
+    return threading.current_thread().name
+
+
+# offload_token ###################################################################################
+def test_offload_token_inline_mode():
+    with mock.patch.object(config, "jwt_verification_mode", "inline"):
+        assert not offload_token("x" * 10000)
+
+
+def test_offload_token_small_token_fast_path():
+    with mock.patch.object(config, "jwt_verification_mode", "thread"), mock.patch.object(
+        config, "jwt_inline_max_token_size", 100
+    ):
+        assert not offload_token("x" * 100)
+        assert offload_token("x" * 101)
+
+
+def test_offload_token_default_size_offloads_rs256_token():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", "thread"):
+        offloaded = offload_token(encoded_token)
+
+    # Assert
+    assert offloaded
+
+
+# run_verification ################################################################################
+@pytest.mark.asyncio
+async def test_run_verification_inline():
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", "inline"):
+        result = await run_verification(current_thread_name, encoded_token="x" * 10000)
+
+    # Assert
+    assert result == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_run_verification_thread():
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", "thread"), mock.patch.object(
+        config, "jwt_inline_max_token_size", 0
+    ):
+        result = await run_verification(current_thread_name, encoded_token="x")
+    shutdown_executors()
+
+    # Assert
+    assert result.startswith("jwt-verification")
+
+
+@pytest.mark.asyncio
+async def test_run_verification_thread_validates_token():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", "thread"), mock.patch.object(
+        config, "jwt_inline_max_token_size", 0
+    ):
+        result = await run_verification(
+            validate_and_decode_token,
+            encoded_token=encoded_token,
+            public_key=load_public_key(TESTING_PUBLIC_KEY, "RS256"),
+            issuer=DECODED_MOCK_JWT["iss"],
+            algorithms=["RS256"],
+        )
+    shutdown_executors()
+
+    # Assert
+    assert result["email"] == DECODED_MOCK_JWT["email"]
+
+
+# decode_in_process ###############################################################################
+def test_serialize_public_key():
+    # Arrange
+    key_object = load_public_key(TESTING_PUBLIC_KEY, "RS256")
+
+    # Act
+    result = serialize_public_key(key_object)
+
+    # Assert
+    assert result.decode().strip() == TESTING_PUBLIC_KEY.strip()
+    assert serialize_public_key(b"secret") == b"secret"
+
+
+def test_validate_and_decode_token_in_process():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    key_object = load_public_key(TESTING_PUBLIC_KEY, "RS256")
+
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", "process"), mock.patch.object(
+        config, "jwt_inline_max_token_size", 0
+    ), mock.patch.object(config, "jwt_verification_workers", 1), mock.patch(
+        "mumichaspy.fastapi_jwt_chassis.validation.decode_in_process", wraps=decode_in_process
+    ) as mock_decode_in_process:
+        result = validate_and_decode_token(
+            encoded_token, key_object, DECODED_MOCK_JWT["iss"], ["RS256"]
+        )
+    shutdown_executors()
+
+    # Assert
+    mock_decode_in_process.assert_called_once()
+    assert result["email"] == DECODED_MOCK_JWT["email"]
+
+
+# _decode_in_worker ###############################################################################
+def test_decode_in_worker_keys_bounded():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    issuer = DECODED_MOCK_JWT["iss"]
+
+    # Act
+    with mock.patch.object(executor, "_worker_keys", executor.OrderedDict()) as worker_keys:
+        for i in range(executor.WORKER_KEYS_MAXSIZE + 2):
+            # Distinct (equivalent) PEMs, as after key rotations
+            public_key = TESTING_PUBLIC_KEY + "\n" * i
+            executor._decode_in_worker(encoded_token, public_key, issuer, ["RS256"])
+
+        # Assert
+        assert len(worker_keys) == executor.WORKER_KEYS_MAXSIZE
+        assert (TESTING_PUBLIC_KEY, "RS256") not in worker_keys
@@ -0,0 +1,215 @@
+from unittest import mock
+
+import pytest
+
+from mumichaspy.fastapi_jwt_chassis.jwks import KeyStore, get_max_age
+from mumichaspy.fastapi_jwt_chassis.mocks import TESTING_KID, get_mock_jwks
+from mumichaspy.fastapi_jwt_chassis.time import FrozenClock
+
+URL = "https://example.com/.well-known/jwks.json"
+
+
+def mock_response(status_code=200, json_body=None, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.json.return_value = json_body
+    response.headers = headers or {}
+    return response
+
+
+# get_max_age #####################################################################################
+def test_get_max_age():
+    assert get_max_age("public, max-age=600") == 600
+    assert get_max_age("no-cache") is None
+    assert get_max_age("public") is None
+    assert get_max_age(None) is None
+
+
+# KeyStore ########################################################################################
+@mock.patch("httpx.Client.get")
+def test_key_store_refresh_ok(mock_get):
+    # Arrange
+    mock_get.return_value = mock_response(
+        json_body=get_mock_jwks(),
+        headers={"ETag": '"v1"', "Cache-Control": "max-age=120"},
+    )
+    key_store = KeyStore(jwks_url=URL)
+
+    # Act
+    result = key_store.refresh()
+
+    # Assert
+    assert result is True
+    mock_get.assert_called_once_with(URL, headers={})
+    assert key_store.get_key(TESTING_KID) is not None
+    assert key_store.get_key("other") is None
+    assert key_store.etag == '"v1"'
+    assert key_store.max_age == 120
+
+
+@mock.patch("httpx.Client.get")
+def test_key_store_refresh_not_modified(mock_get):
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+    key_store.load_jwks(get_mock_jwks())
+    key_store.etag = '"v1"'
+    mock_get.return_value = mock_response(status_code=304)
+
+    # Act
+    result = key_store.refresh()
+
+    # Assert
+    assert result is True
+    mock_get.assert_called_once_with(URL, headers={"If-None-Match": '"v1"'})
+    assert key_store.get_key(TESTING_KID) is not None
+
+
+@mock.patch("httpx.Client.get")
+def test_key_store_refresh_error_keeps_keys(mock_get):
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+    key_store.load_jwks(get_mock_jwks())
+    mock_get.return_value = mock_response(status_code=500)
+
+    # Act
+    result = key_store.refresh()
+
+    # Assert
+    assert result is False
+    assert key_store.get_key(TESTING_KID) is not None
+
+
+@pytest.mark.asyncio
+@mock.patch("httpx.AsyncClient.get")
+async def test_key_store_refresh_async_ok(mock_get):
+    # Arrange
+    mock_get.return_value = mock_response(json_body=get_mock_jwks(), headers={"ETag": '"v1"'})
+    key_store = KeyStore(jwks_url=URL)
+
+    # Act
+    result = await key_store.refresh_async()
+
+    # Assert
+    assert result is True
+    mock_get.assert_called_once_with(URL, headers={})
+    assert key_store.get_key(TESTING_KID) is not None
+    assert key_store.etag == '"v1"'
+
+
+@pytest.mark.asyncio
+@mock.patch.object(KeyStore, "refresh_async")
+async def test_key_store_refresh_unknown_kid_async(mock_refresh_async):
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+
+    async def refresh_async():
+        key_store.load_jwks(get_mock_jwks())
+        return True
+
+    mock_refresh_async.side_effect = refresh_async
+
+    # Act
+    result = await key_store.refresh_unknown_kid_async(TESTING_KID)
+
+    # Assert
+    mock_refresh_async.assert_awaited_once()
+    assert result is key_store.get_key(TESTING_KID)
+
+
+@mock.patch("httpx.Client.get")
+def test_key_store_refresh_no_url(mock_get):
+    assert KeyStore().refresh() is False
+    mock_get.assert_not_called()
+
+
+def test_key_store_load_jwks_reuses_unchanged_keys():
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+    key_store.load_jwks(get_mock_jwks())
+    first = key_store.get_key(TESTING_KID)
+
+    # Act
+    key_store.load_jwks(get_mock_jwks())
+
+    # Assert
+    assert key_store.get_key(TESTING_KID) is first
+
+
+def test_key_store_load_jwks_rotation():
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+    key_store.load_jwks(get_mock_jwks("old"))
+
+    # Act
+    key_store.load_jwks(get_mock_jwks("new"))
+
+    # Assert
+    assert key_store.get_key("old") is None
+    assert key_store.get_key("new") is not None
+
+
+def test_key_store_load_jwks_skips_invalid_keys():
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+    jwks = get_mock_jwks()
+    jwks["keys"].append({"kid": "broken", "kty": "RSA"})
+    jwks["keys"].append({**get_mock_jwks("enc")["keys"][0], "use": "enc"})
+
+    # Act
+    key_store.load_jwks(jwks)
+
+    # Assert
+    assert list(key_store.keys) == [TESTING_KID]
+
+
+@mock.patch.object(KeyStore, "refresh")
+def test_key_store_refresh_unknown_kid_rate_limited(mock_refresh):
+    # Arrange
+    clock = FrozenClock(1000.0)
+    key_store = KeyStore(jwks_url=URL, min_refetch_interval=30, clock=clock)
+
+    def refresh():
+        key_store._last_fetch = clock()
+        return True
+
+    mock_refresh.side_effect = refresh
+
+    # Act
+    key_store.refresh_unknown_kid("unknown")
+    clock.advance(10)
+    key_store.refresh_unknown_kid("unknown")
+    clock.advance(30)
+    key_store.refresh_unknown_kid("unknown")
+
+    # Assert
+    assert mock_refresh.call_count == 2
+
+
+def test_key_store_next_refresh_delay():
+    # Arrange
+    key_store = KeyStore(jwks_url=URL, refresh_interval=1000, min_refetch_interval=30)
+
+    # Assert
+    assert 900 <= key_store.next_refresh_delay() <= 1100
+    key_store.max_age = 100
+    assert 90 <= key_store.next_refresh_delay() <= 110
+    key_store.max_age = 0
+    assert 27 <= key_store.next_refresh_delay() <= 33
+
+
+@mock.patch.object(KeyStore, "next_refresh_delay", return_value=0.01)
+@mock.patch.object(KeyStore, "refresh")
+def test_key_store_background_refresh(mock_refresh, mock_delay):
+    # Arrange
+    key_store = KeyStore(jwks_url=URL)
+
+    # Act
+    key_store.start_background_refresh()
+    for _ in range(100):
+        if mock_refresh.call_count > 0:
+            break
+        key_store._stop_event.wait(0.01)
+    key_store.stop_background_refresh()
+
+    # Assert
+    assert mock_refresh.call_count > 0
@@ -0,0 +1,108 @@
+import os
+import time
+
+from mumichaspy.fastapi_jwt_chassis.key_file import (
+    PUBLIC_KEY_FILE_MODE,
+    KeyFileLock,
+    get_key_file_mtime,
+    read_fresh_key_file,
+    write_key_file,
+)
+from mumichaspy.fastapi_jwt_chassis.mocks import TESTING_PUBLIC_KEY
+
+
+def test_write_key_file(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    # Act
+    first_write = write_key_file(TESTING_PUBLIC_KEY, file_path)
+    second_write = write_key_file(TESTING_PUBLIC_KEY, file_path)
+
+    # Assert
+    assert first_write
+    assert not second_write
+    with open(file_path) as f:
+        assert f.read() == TESTING_PUBLIC_KEY
+    assert os.listdir(tmp_path) == ["public_key.pem"]
+
+
+def test_write_key_file_unchanged_refresh_mtime(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+    write_key_file(TESTING_PUBLIC_KEY, file_path)
+    os.utime(file_path, (0, 0))
+
+    # Act
+    written = write_key_file(TESTING_PUBLIC_KEY, file_path)
+    mtime = get_key_file_mtime(file_path)
+    refreshed = write_key_file(TESTING_PUBLIC_KEY, file_path, refresh_mtime=True)
+
+    # Assert
+    assert not written
+    assert not refreshed
+    assert mtime == 0
+    assert abs(get_key_file_mtime(file_path) - time.time()) < 60
+
+
+def test_write_key_file_mode(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    # Act
+    write_key_file(TESTING_PUBLIC_KEY, file_path)
+    new_mode = os.stat(file_path).st_mode & 0o777
+    os.chmod(file_path, 0o640)
+    write_key_file("other key", file_path)
+    existing_mode = os.stat(file_path).st_mode & 0o777
+
+    # Assert
+    assert new_mode == PUBLIC_KEY_FILE_MODE
+    assert existing_mode == 0o640
+
+
+def test_read_fresh_key_file(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+    write_key_file(TESTING_PUBLIC_KEY, file_path)
+    mtime = get_key_file_mtime(file_path)
+
+    # Act
+    fresh = read_fresh_key_file(file_path, 60, clock=lambda: mtime + 30)
+    stale = read_fresh_key_file(file_path, 60, clock=lambda: mtime + 90)
+    missing = read_fresh_key_file(str(tmp_path / "missing.pem"), 60)
+
+    # Assert
+    assert fresh == TESTING_PUBLIC_KEY
+    assert stale is None
+    assert missing is None
+
+
+def test_get_key_file_mtime(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+
+    # Act
+    missing = get_key_file_mtime(file_path)
+    write_key_file(TESTING_PUBLIC_KEY, file_path)
+    written = get_key_file_mtime(file_path)
+
+    # Assert
+    assert missing is None
+    assert abs(written - time.time()) < 60
+
+
+def test_key_file_lock(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "public_key.pem")
+    other_lock = KeyFileLock(file_path)
+
+    # Act
+    with KeyFileLock(file_path):
+        acquired_while_locked = other_lock.acquire(blocking=False)
+    acquired_after_release = other_lock.acquire(blocking=False)
+    other_lock.release()
+
+    # Assert
+    assert not acquired_while_locked
+    assert acquired_after_release
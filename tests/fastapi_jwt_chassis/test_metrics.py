@@ -0,0 +1,83 @@
+from mumichaspy.fastapi_jwt_chassis.cache import TokenCache
+from mumichaspy.fastapi_jwt_chassis.metrics import (
+    MetricsSink,
+    PrometheusMetricsSink,
+    format_labels,
+)
+
+
+def test_metrics_sink_noop():
+    # Arrange
+    sink = MetricsSink()
+
+    # Act
+    sink.observe("latency", 0.1, {"stage": "header"})
+    sink.increment("failures", {"reason": "invalid_token"})
+    sink.add_cache("token", TokenCache())
+
+    # Assert
+    assert not sink.enabled
+
+
+def test_prometheus_metrics_sink_histogram():
+    # Arrange
+    sink = PrometheusMetricsSink(buckets=(0.1, 1))
+
+    # Act
+    sink.observe("latency_seconds", 0.05, {"stage": "header"})
+    sink.observe("latency_seconds", 0.5, {"stage": "header"})
+    sink.observe("latency_seconds", 5, {"stage": "header"})
+    text = sink.render()
+
+    # Assert
+    assert text.splitlines() == [
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="header",le="0.1"} 1',
+        'latency_seconds_bucket{stage="header",le="1"} 2',
+        'latency_seconds_bucket{stage="header",le="+Inf"} 3',
+        'latency_seconds_sum{stage="header"} 5.55',
+        'latency_seconds_count{stage="header"} 3',
+    ]
+
+
+def test_prometheus_metrics_sink_counter():
+    # Arrange
+    sink = PrometheusMetricsSink()
+
+    # Act
+    sink.increment("failures_total", {"reason": "invalid_token"})
+    sink.increment("failures_total", {"reason": "invalid_token"})
+    sink.increment("failures_total", {"reason": "forbidden"})
+    text = sink.render()
+
+    # Assert
+    assert text.splitlines() == [
+        "# TYPE failures_total counter",
+        'failures_total{reason="forbidden"} 1',
+        'failures_total{reason="invalid_token"} 2',
+    ]
+
+
+def test_prometheus_metrics_sink_cache():
+    # Arrange
+    sink = PrometheusMetricsSink()
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.set("token", {"sub": "1"})
+    cache.get("token")
+    cache.get("other")
+    cache.get("another")
+
+    # Act
+    sink.add_cache("token", cache)
+    text = sink.render()
+
+    # Assert
+    assert 'jwt_cache_hits_total{cache="token"} 1' in text
+    assert 'jwt_cache_misses_total{cache="token"} 2' in text
+    assert 'jwt_cache_size{cache="token"} 1' in text
+    assert 'jwt_cache_hit_ratio{cache="token"} 0.3333333333333333' in text
+
+
+def test_format_labels_escaping():
+    assert format_labels(()) == ""
+    assert format_labels((("path", 'a"b\\c\nd'),)) == '{path="a\\"b\\\\c\\nd"}'
@@ -0,0 +1,181 @@
+from unittest import mock
+
+import pytest
+from fastapi import Depends, FastAPI, Request, WebSocket, status
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.middleware import JWTAuthenticationMiddleware
+from mumichaspy.fastapi_jwt_chassis.mocks import (
+    DECODED_ADMIN_MOCK_JWT,
+    DECODED_MOCK_JWT,
+    TESTING_PUBLIC_KEY,
+    get_encoded_mock_jwt,
+)
+from mumichaspy.fastapi_jwt_chassis.validation import JWTBearerAdmin, decode_bearer_token
+
+config.public_key = TESTING_PUBLIC_KEY
+
+
+def get_app():
+    app = FastAPI()
+    app.add_middleware(JWTAuthenticationMiddleware, public_paths=["/health", "/docs"])
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/health/live")
+    def health_live():
+        return {"status": "ok"}
+
+    @app.get("/healthcheck-admin")
+    def healthcheck_admin():
+        return {"status": "ok"}
+
+    @app.get("/me")
+    def me(request: Request):
+        return {"email": request.state.jwt[1]["email"]}
+
+    @app.get("/admin")
+    def admin(decoded_jwt: dict = Depends(JWTBearerAdmin())):
+        return {"email": decoded_jwt["email"]}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json({"email": websocket.state.jwt[1]["email"]})
+        await websocket.close()
+
+    return app
+
+
+def test_middleware_public_path():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/health")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_middleware_below_public_path():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/health/live")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_middleware_sibling_of_public_path():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/healthcheck-admin")
+
+    # Assert
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_middleware_valid_token():
+    # Arrange
+    client = TestClient(get_app())
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    response = client.get("/me", headers={"Authorization": f"Bearer {encoded_token}"})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"email": DECODED_MOCK_JWT["email"]}
+
+
+def test_middleware_missing_token():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/me")
+
+    # Assert
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert response.json() == {"detail": "Not authenticated"}
+
+
+def test_middleware_invalid_scheme():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/me", headers={"Authorization": "Basic dXNlcjpwYXNz"})
+
+    # Assert
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Invalid authentication scheme"}
+
+
+def test_middleware_invalid_token():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    response = client.get("/me", headers={"Authorization": "Bearer invalid"})
+
+    # Assert
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_middleware_claims_reused_by_bearers():
+    # Arrange
+    client = TestClient(get_app())
+    encoded_token = get_encoded_mock_jwt({**DECODED_ADMIN_MOCK_JWT})
+
+    # Act
+    with mock.patch(
+        "mumichaspy.fastapi_jwt_chassis.middleware.decode_bearer_token",
+        wraps=decode_bearer_token,
+    ) as mock_middleware_decode, mock.patch(
+        "mumichaspy.fastapi_jwt_chassis.validation.decode_bearer_token"
+    ) as mock_bearer_decode:
+        response = client.get("/admin", headers={"Authorization": f"Bearer {encoded_token}"})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    mock_middleware_decode.assert_called_once()
+    mock_bearer_decode.assert_not_called()
+
+
+def test_middleware_websocket_missing_token():
+    # Arrange
+    client = TestClient(get_app())
+
+    # Act
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws"):
+            pass
+
+    # Assert
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_middleware_websocket_valid_token():
+    # Arrange
+    client = TestClient(get_app())
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    with client.websocket_connect(
+        "/ws", headers={"Authorization": f"Bearer {encoded_token}"}
+    ) as websocket:
+        data = websocket.receive_json()
+
+    # Assert
+    assert data == {"email": DECODED_MOCK_JWT["email"]}
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import jwt
+import pytest
+
+from mumichaspy.fastapi_jwt_chassis.mocks import (
+    DECODED_MOCK_JWT,
+    TESTING_PRIVATE_KEY,
+    TESTING_PUBLIC_KEY,
+    get_encoded_mock_jwt,
+)
+from mumichaspy.fastapi_jwt_chassis.signing import TokenSigner
+from mumichaspy.fastapi_jwt_chassis.time import current_timestamp
+
+PAYLOAD = {**DECODED_MOCK_JWT, "sub": "1", "exp": 4102444800}
+
+
+@pytest.mark.parametrize("headers", [None, {"kid": "testing-key"}])
+def test_token_signer_matches_jwt_encode(headers):
+    # Arrange
+    signer = TokenSigner(TESTING_PRIVATE_KEY, algorithm="RS256", headers=headers)
+
+    # Act
+    encoded_token = signer.sign(PAYLOAD)
+
+    # Assert
+    assert encoded_token == jwt.encode(
+        PAYLOAD, TESTING_PRIVATE_KEY, algorithm="RS256", headers=headers
+    )
+
+
+def test_token_signer_hmac():
+    # Arrange
+    signer = TokenSigner("secret-of-at-least-32-bytes-long!", algorithm="HS256")
+
+    # Act
+    encoded_token = signer.sign(PAYLOAD)
+
+    # Assert
+    decoded_jwt = jwt.decode(
+        encoded_token, "secret-of-at-least-32-bytes-long!", algorithms=["HS256"]
+    )
+    assert decoded_jwt == PAYLOAD
+
+
+def test_token_signer_lifetime_does_not_modify_payload():
+    # Arrange
+    signer = TokenSigner(TESTING_PRIVATE_KEY)
+    payload = {"sub": "1"}
+
+    # Act
+    encoded_token = signer.sign(payload, lifetime=60)
+
+    # Assert
+    decoded_jwt = jwt.decode(encoded_token, TESTING_PUBLIC_KEY, algorithms=["RS256"])
+    assert payload == {"sub": "1"}
+    assert decoded_jwt["exp"] - decoded_jwt["iat"] == 60
+    assert decoded_jwt["iat"] <= current_timestamp()
+
+
+def test_token_signer_datetime_claims():
+    # Arrange
+    signer = TokenSigner(TESTING_PRIVATE_KEY)
+    exp = datetime(2100, 1, 1, tzinfo=timezone.utc)
+
+    # Act
+    encoded_token = signer.sign({"sub": "1", "exp": exp})
+
+    # Assert
+    decoded_jwt = jwt.decode(encoded_token, TESTING_PUBLIC_KEY, algorithms=["RS256"])
+    assert decoded_jwt["exp"] == int(exp.timestamp())
+
+
+def test_token_signer_sign_many():
+    # Arrange
+    signer = TokenSigner(TESTING_PRIVATE_KEY)
+    payloads = [{"sub": str(i)} for i in range(3)]
+
+    # Act
+    encoded_tokens = signer.sign_many(payloads, lifetime=60, headers={"kid": "other"})
+
+    # Assert
+    assert len(encoded_tokens) == 3
+    for i, encoded_token in enumerate(encoded_tokens):
+        assert jwt.get_unverified_header(encoded_token)["kid"] == "other"
+        decoded_jwt = jwt.decode(encoded_token, TESTING_PUBLIC_KEY, algorithms=["RS256"])
+        assert decoded_jwt["sub"] == str(i)
+
+
+def test_get_encoded_mock_jwt_does_not_modify_payload():
+    # Arrange
+    payload = {**DECODED_MOCK_JWT}
+
+    # Act
+    get_encoded_mock_jwt(payload)
+
+    # Assert
+    assert payload == DECODED_MOCK_JWT
+    assert "exp" not in payload
@@ -0,0 +1,140 @@
+from unittest import mock
+
+import httpx
+import jwt
+import pytest
+
+from mumichaspy.fastapi_jwt_chassis.config import (
+    get_public_key_from_url,
+    get_public_key_from_url_async,
+)
+from mumichaspy.fastapi_jwt_chassis.jwks import KeyStore
+from mumichaspy.fastapi_jwt_chassis.mocks import TESTING_KID, TESTING_PUBLIC_KEY
+from mumichaspy.fastapi_jwt_chassis.testing_issuer import (
+    JWKS_PATH,
+    PUBLIC_KEY_PATH,
+    TOKEN_PATH,
+    IssuerStandIn,
+)
+
+
+@pytest.fixture(scope="module")
+def served_issuer():
+    with IssuerStandIn(issuer="stand-in", key_size=1024) as issuer:
+        yield issuer
+
+
+def test_issuer_serves_public_key(served_issuer):
+    # Act
+    public_key = get_public_key_from_url(served_issuer.url + PUBLIC_KEY_PATH)
+
+    # Assert
+    assert public_key == TESTING_PUBLIC_KEY
+
+
+def test_issuer_fail_next(served_issuer):
+    # Arrange
+    served_issuer.fail_next(1)
+
+    # Act
+    failed = get_public_key_from_url(served_issuer.url + PUBLIC_KEY_PATH)
+    recovered = get_public_key_from_url(served_issuer.url + PUBLIC_KEY_PATH)
+
+    # Assert
+    assert failed is None
+    assert recovered == TESTING_PUBLIC_KEY
+
+
+@pytest.mark.asyncio
+@mock.patch("asyncio.sleep", new_callable=mock.AsyncMock)
+async def test_issuer_fail_next_async_retries(mock_sleep, served_issuer):
+    # Arrange
+    served_issuer.fail_next(2)
+
+    # Act
+    public_key = await get_public_key_from_url_async(served_issuer.url + PUBLIC_KEY_PATH)
+
+    # Assert
+    assert public_key == TESTING_PUBLIC_KEY
+    assert mock_sleep.call_count == 2
+
+
+def test_issuer_jwks_etag_and_rotation():
+    # Arrange
+    with IssuerStandIn(key_size=1024) as issuer:
+        key_store = KeyStore(issuer.url + JWKS_PATH)
+
+        # Act
+        key_store.refresh()
+        etag = key_store.etag
+        key_store.refresh()
+        requests_before_rotation = issuer.requests[JWKS_PATH]
+        kid = issuer.rotate_key()
+        key_store.refresh()
+
+    # Assert
+    assert requests_before_rotation == 2
+    assert key_store.max_age == 300
+    assert key_store.etag != etag
+    assert set(key_store.keys) == {TESTING_KID, kid}
+
+
+def test_issuer_rotation_without_previous_keys():
+    # Arrange
+    issuer = IssuerStandIn(key_size=1024)
+
+    # Act
+    kid = issuer.rotate_key(keep_previous=False)
+    jwks_kids = [jwk["kid"] for jwk in issuer.get_jwks()["keys"]]
+    next_kid = issuer.rotate_key()
+
+    # Assert
+    assert jwks_kids == [kid]
+    assert len({TESTING_KID, kid, next_kid}) == 3
+    assert [jwk["kid"] for jwk in issuer.get_jwks()["keys"]] == [kid, next_kid]
+
+
+def test_issuer_mint():
+    # Arrange
+    issuer = IssuerStandIn(issuer="stand-in")
+    claims = {"sub": "1"}
+
+    # Act
+    encoded_tokens = [issuer.mint(claims)] + issuer.mint_many([claims, claims])
+
+    # Assert
+    assert claims == {"sub": "1"}
+    for encoded_token in encoded_tokens:
+        assert jwt.get_unverified_header(encoded_token)["kid"] == TESTING_KID
+        decoded_jwt = jwt.decode(
+            encoded_token, TESTING_PUBLIC_KEY, algorithms=["RS256"], issuer="stand-in"
+        )
+        assert decoded_jwt["sub"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_issuer_asgi_app():
+    # Arrange
+    issuer = IssuerStandIn(issuer="stand-in")
+    transport = httpx.ASGITransport(app=issuer)
+
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://issuer") as client:
+        token_response = await client.post(TOKEN_PATH, json={"sub": "1"})
+        jwks_response = await client.get(JWKS_PATH)
+        not_modified = await client.get(
+            JWKS_PATH, headers={"If-None-Match": jwks_response.headers["ETag"]}
+        )
+        not_found = await client.get("/unknown")
+
+    # Assert
+    decoded_jwt = jwt.decode(
+        token_response.json()["access_token"],
+        TESTING_PUBLIC_KEY,
+        algorithms=["RS256"],
+        issuer="stand-in",
+    )
+    assert decoded_jwt["sub"] == "1"
+    assert jwks_response.json()["keys"][0]["kid"] == TESTING_KID
+    assert not_modified.status_code == 304
+    assert not_found.status_code == 404
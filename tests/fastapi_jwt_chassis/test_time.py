@@ -1,8 +1,20 @@
+import sys
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+
 from mumichaspy.fastapi_jwt_chassis.time import (
+    CoarseClock,
+    FrozenClock,
+    coarse_clock,
     current_timestamp,
     current_timestamp_with_timedelta,
     current_datetime,
     current_datetime_with_timedelta,
+    datetime_from_timestamp,
+    get_timezone,
+    timedelta_seconds,
 )
 
 
@@ -33,3 +45,119 @@ def test_current_timestamp_with_timedelta():
 
     # Assert
     assert result >= current_timestamp_1 + 300
+
+
+def test_current_timestamp_matches_datetime():
+    # Act
+    before = int(current_datetime().timestamp())
+    result = current_timestamp()
+    after = int(current_datetime().timestamp())
+
+    # Assert
+    assert before <= result <= after
+
+
+def test_current_timestamp_with_timedelta_units():
+    # Arrange
+    current_timestamp_1 = current_timestamp()
+
+    # Act
+    result = current_timestamp_with_timedelta(
+        weeks=1, days=1, hours=1, minutes=1, seconds=1, milliseconds=1000, microseconds=1000000
+    )
+
+    # Assert
+    expected_delta = 604800 + 86400 + 3600 + 60 + 1 + 1 + 1
+    assert current_timestamp_1 + expected_delta <= result <= current_timestamp() + expected_delta
+
+
+def test_timedelta_seconds():
+    assert timedelta_seconds(
+        days=1, seconds=2, microseconds=3, milliseconds=4, minutes=5, hours=6, weeks=7
+    ) == pytest.approx(
+        timedelta(
+            days=1, seconds=2, microseconds=3, milliseconds=4, minutes=5, hours=6, weeks=7
+        ).total_seconds()
+    )
+
+
+def test_get_timezone_cached():
+    assert get_timezone("Europe/Madrid") is get_timezone("Europe/Madrid")
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="zoneinfo requires Python 3.9")
+def test_get_timezone_zoneinfo():
+    # Act
+    time_zone = get_timezone("Europe/Madrid", backend="zoneinfo")
+
+    # Assert
+    assert type(time_zone).__module__ == "zoneinfo"
+    assert datetime_from_timestamp(0, "UTC").utcoffset() == timedelta(0)
+
+
+def test_get_timezone_pytz():
+    # Act
+    time_zone = get_timezone("Europe/Madrid", backend="pytz")
+
+    # Assert
+    assert type(time_zone).__module__.startswith("pytz")
+
+
+def test_datetime_from_timestamp():
+    # Act
+    result = datetime_from_timestamp(0, "UTC")
+
+    # Assert
+    assert result.year == 1970
+    assert result.timestamp() == 0
+
+
+# Clocks ##########################################################################################
+def test_coarse_clock_updates_once_per_tick():
+    # Arrange
+    monotonic = FrozenClock(0)
+    wall = FrozenClock(1000)
+    with mock.patch("time.monotonic", monotonic), mock.patch("time.time", wall):
+        clock = CoarseClock(tick=1)
+
+        # Act
+        wall.advance(0.5)
+        monotonic.advance(0.5)
+        within_tick = clock()
+        monotonic.advance(0.5)
+        after_tick = clock()
+
+    # Assert
+    assert within_tick == 1000
+    assert after_tick == 1000.5
+
+
+def test_coarse_clock_never_goes_backwards():
+    # Arrange
+    monotonic = FrozenClock(0)
+    wall = FrozenClock(1000)
+    with mock.patch("time.monotonic", monotonic), mock.patch("time.time", wall):
+        clock = CoarseClock(tick=1)
+
+        # Act
+        wall.advance(-10)
+        monotonic.advance(2)
+        result = clock()
+
+    # Assert
+    assert result == 1000
+
+
+def test_coarse_clock_is_close_to_current_timestamp():
+    assert abs(coarse_clock() - current_timestamp()) <= coarse_clock.tick + 1
+
+
+def test_frozen_clock():
+    # Arrange
+    clock = FrozenClock(1000)
+
+    # Act
+    clock.advance(5)
+
+    # Assert
+    assert clock() == 1005
@@ -2,22 +2,42 @@ import logging
 from unittest import mock
 from unittest.mock import MagicMock
 
+import jwt
 import pytest
-from fastapi import HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
 
-from mumichaspy.fastapi_jwt_chassis.config import config
+from mumichaspy.fastapi_jwt_chassis.cache import TokenCache
+from mumichaspy.fastapi_jwt_chassis.claims import Claims
+from mumichaspy.fastapi_jwt_chassis.config import Verifier, config
+from mumichaspy.fastapi_jwt_chassis.executor import shutdown_executors
+from mumichaspy.fastapi_jwt_chassis.jwks import KeyStore
+from mumichaspy.fastapi_jwt_chassis.metrics import PrometheusMetricsSink
 from mumichaspy.fastapi_jwt_chassis.mocks import (
+    TESTING_KID,
     TESTING_PUBLIC_KEY,
     DECODED_MOCK_JWT,
     DECODED_ADMIN_MOCK_JWT,
     assert_token_validation_called,
     get_encoded_mock_jwt,
+    get_mock_jwks,
 )
-from mumichaspy.fastapi_jwt_chassis.time import current_timestamp
+from mumichaspy.fastapi_jwt_chassis.testing_issuer import IssuerStandIn
+from mumichaspy.fastapi_jwt_chassis.time import FrozenClock, current_timestamp
 from mumichaspy.fastapi_jwt_chassis.validation import (
     validate_and_decode_token,
+    validate_and_decode_tokens,
+    get_public_key_for_token,
+    get_issuer_verifier,
+    raise_and_log_error,
+    LogRateLimiter,
     JWTBearer,
     JWTBearerAdmin,
+    get_request_jwt,
+    has_roles,
+    jwt_bearer,
+    require_roles,
+    set_request_jwt,
 )
 
 logger = logging.getLogger(__name__)
@@ -68,6 +88,245 @@ def test_validate_and_decode_token_exp_error():
     assert exc.value.detail == "Could not decode JWT"
 
 
+def test_validate_and_decode_token_key_object():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    result = validate_and_decode_token(
+        encoded_token,
+        config.public_key_object,
+        DECODED_MOCK_JWT["iss"],
+        [config.jwt_algorithm],
+    )
+
+    # Assert
+    assert result["email"] == DECODED_MOCK_JWT["email"]
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.jwt.decode", wraps=jwt.decode)
+def test_validate_and_decode_token_cached(mock_decode):
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    token_cache = TokenCache(maxsize=10, ttl=60)
+
+    # Act
+    with mock.patch.object(config, "token_cache", token_cache):
+        first = validate_and_decode_token(
+            encoded_token, TESTING_PUBLIC_KEY, DECODED_MOCK_JWT["iss"], [config.jwt_algorithm]
+        )
+        second = validate_and_decode_token(
+            encoded_token, TESTING_PUBLIC_KEY, DECODED_MOCK_JWT["iss"], [config.jwt_algorithm]
+        )
+
+    # Assert
+    mock_decode.assert_called_once()
+    assert first == second
+    assert token_cache.hits == 1
+    assert token_cache.misses == 1
+
+
+def test_validate_and_decode_token_negative_cache():
+    # Arrange
+    current_timestamp_sec = current_timestamp()
+    encoded_token = get_encoded_mock_jwt(
+        {**DECODED_MOCK_JWT, "exp": current_timestamp_sec - 1, "iat": current_timestamp_sec - 301}
+    )
+    rejected_token_cache = TokenCache(maxsize=10, ttl=60)
+
+    # Act
+    with mock.patch.object(config, "rejected_token_cache", rejected_token_cache), mock.patch(
+        "mumichaspy.fastapi_jwt_chassis.validation.jwt.decode", wraps=jwt.decode
+    ) as mock_decode:
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                validate_and_decode_token(
+                    encoded_token, TESTING_PUBLIC_KEY, DECODED_MOCK_JWT["iss"], ["RS256"]
+                )
+            assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+            assert exc.value.detail == "Could not decode JWT"
+
+    # Assert
+    mock_decode.assert_called_once()
+    assert rejected_token_cache.hits == 2
+
+
+def test_validate_and_decode_token_negative_cache_immature_token():
+    # Arrange
+    current_timestamp_sec = current_timestamp()
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT, "nbf": current_timestamp_sec + 60})
+    rejected_token_cache = TokenCache(maxsize=10, ttl=60)
+
+    # Act
+    with mock.patch.object(config, "rejected_token_cache", rejected_token_cache):
+        with pytest.raises(HTTPException):
+            validate_and_decode_token(
+                encoded_token, TESTING_PUBLIC_KEY, DECODED_MOCK_JWT["iss"], ["RS256"]
+            )
+
+    # Assert
+    assert len(rejected_token_cache) == 0
+
+
+@pytest.mark.parametrize("verification_mode", ["inline", "thread", "process"])
+def test_validate_and_decode_tokens(verification_mode):
+    # Arrange
+    current_timestamp_sec = current_timestamp()
+    valid_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    admin_token = get_encoded_mock_jwt({**DECODED_ADMIN_MOCK_JWT})
+    expired_token = get_encoded_mock_jwt(
+        {**DECODED_MOCK_JWT, "exp": current_timestamp_sec - 1, "iat": current_timestamp_sec - 301}
+    )
+    encoded_tokens = [valid_token, expired_token, admin_token, valid_token, "malformed"]
+
+    # Act
+    with mock.patch.object(config, "jwt_verification_mode", verification_mode):
+        results = validate_and_decode_tokens(encoded_tokens)
+    shutdown_executors()
+
+    # Assert
+    assert len(results) == len(encoded_tokens)
+    assert results[0]["email"] == DECODED_MOCK_JWT["email"]
+    assert isinstance(results[1], jwt.exceptions.ExpiredSignatureError)
+    assert results[2]["email"] == DECODED_ADMIN_MOCK_JWT["email"]
+    assert results[3] == results[0]
+    assert results[3] is not results[0]
+    assert isinstance(results[4], jwt.exceptions.DecodeError)
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.jwt.decode", wraps=jwt.decode)
+def test_validate_and_decode_tokens_deduplicated(mock_decode):
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act
+    results = validate_and_decode_tokens([encoded_token] * 5)
+
+    # Assert
+    mock_decode.assert_called_once()
+    assert len(results) == 5
+
+
+def test_validate_and_decode_tokens_cached():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    token_cache = TokenCache(maxsize=10, ttl=60)
+
+    # Act
+    with mock.patch.object(config, "token_cache", token_cache):
+        validate_and_decode_tokens([encoded_token, "malformed"])
+        results = validate_and_decode_tokens([encoded_token])
+
+    # Assert
+    assert results[0]["email"] == DECODED_MOCK_JWT["email"]
+    assert token_cache.hits == 1
+    assert len(token_cache) == 1
+
+
+@pytest.mark.parametrize("verification_mode", ["inline", "thread"])
+def test_validate_and_decode_tokens_selects_key_per_token(verification_mode):
+    # Arrange
+    issuer = IssuerStandIn(key_size=1024)
+    issuer.rotate_key()
+    key_store = KeyStore(jwks_url="https://example.com/jwks")
+    key_store.load_jwks(issuer.get_jwks())
+    jwks_tokens = issuer.mint_many([{**DECODED_MOCK_JWT, "sub": str(i)} for i in range(2)])
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    internal_token = jwt.encode(
+        {**DECODED_MOCK_JWT, "iss": "internal", "exp": current_timestamp() + 60},
+        "shared-secret",
+        algorithm="HS256",
+    )
+    unknown_kid_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT}, headers={"kid": "unknown"})
+
+    # Act
+    with mock.patch.object(config, "key_store", key_store), mock.patch.object(
+        config, "verifiers", {"internal": verifier}
+    ), mock.patch.object(config, "jwt_verification_mode", verification_mode), mock.patch.object(
+        KeyStore, "refresh_unknown_kid", return_value=None
+    ):
+        results = validate_and_decode_tokens(jwks_tokens + [internal_token, unknown_kid_token])
+    shutdown_executors()
+
+    # Assert
+    assert [result["sub"] for result in results[:2]] == ["0", "1"]
+    assert results[2]["iss"] == "internal"
+    assert isinstance(results[3], HTTPException)
+
+
+def test_get_public_key_for_token_no_jwks():
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT}, headers={"kid": TESTING_KID})
+
+    # Act
+    with mock.patch.object(config, "key_store", KeyStore()):
+        result = get_public_key_for_token(encoded_token)
+
+    # Assert
+    assert result is config.public_key_object
+
+
+def test_get_public_key_for_token_kid():
+    # Arrange
+    key_store = KeyStore(jwks_url="https://example.com/jwks")
+    key_store.load_jwks(get_mock_jwks())
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT}, headers={"kid": TESTING_KID})
+
+    # Act
+    with mock.patch.object(config, "key_store", key_store):
+        result = get_public_key_for_token(encoded_token)
+        decoded_token = validate_and_decode_token(
+            encoded_token, result, DECODED_MOCK_JWT["iss"], [config.jwt_algorithm]
+        )
+
+    # Assert
+    assert result is key_store.get_key(TESTING_KID).key
+    assert decoded_token["email"] == DECODED_MOCK_JWT["email"]
+
+
+def test_validate_and_decode_token_selects_key_for_token():
+    # Arrange
+    issuer = IssuerStandIn(key_size=1024)
+    issuer.rotate_key()
+    key_store = KeyStore(jwks_url="https://example.com/jwks")
+    key_store.load_jwks(issuer.get_jwks())
+    jwks_token = issuer.mint({**DECODED_MOCK_JWT}, lifetime=60)
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    internal_token = jwt.encode(
+        {**DECODED_MOCK_JWT, "iss": "internal", "exp": current_timestamp() + 60},
+        "shared-secret",
+        algorithm="HS256",
+    )
+
+    # Act
+    with mock.patch.object(config, "key_store", key_store), mock.patch.object(
+        config, "verifiers", {"internal": verifier}
+    ):
+        jwks_decoded_token = validate_and_decode_token(jwks_token)
+        internal_decoded_token = validate_and_decode_token(internal_token)
+
+    # Assert
+    assert jwks_decoded_token["email"] == DECODED_MOCK_JWT["email"]
+    assert internal_decoded_token["iss"] == "internal"
+
+
+@mock.patch.object(KeyStore, "refresh_unknown_kid", return_value=None)
+def test_get_public_key_for_token_unknown_kid(mock_refresh_unknown_kid):
+    # Arrange
+    key_store = KeyStore(jwks_url="https://example.com/jwks")
+    key_store.load_jwks(get_mock_jwks())
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT}, headers={"kid": "unknown"})
+
+    # Act
+    with mock.patch.object(config, "key_store", key_store):
+        with pytest.raises(HTTPException) as exc:
+            get_public_key_for_token(encoded_token)
+
+    # Assert
+    mock_refresh_unknown_kid.assert_called_once_with("unknown")
+    assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 # @Todo: Add more tests for validate_and_decode_token
 # @ToDo: Add more tests for JWTBearer and JWTBearerAdmin
 
@@ -77,11 +336,13 @@ def test_validate_and_decode_token_exp_error():
 async def test_jwt_bearer_ok(mock_validate_and_decode_token):
     """Test JWTBearer with a valid token."""
     # Arrange
-    mock_validate_and_decode_token.return_value = DECODED_MOCK_JWT
+    encoded_token = get_encoded_mock_jwt(DECODED_MOCK_JWT)
+    mock_validate_and_decode_token.return_value = jwt.decode(
+        encoded_token, options={"verify_signature": False}
+    )
 
     jwt_bearer = JWTBearer()
     request = MagicMock()
-    encoded_token = get_encoded_mock_jwt(DECODED_MOCK_JWT)
     request.headers = {"Authorization": f"Bearer {encoded_token}"}
 
     # Act
@@ -98,15 +359,128 @@ async def test_jwt_bearer_ok(mock_validate_and_decode_token):
     assert decoded_jwt["iat"] <= current_timestamp()
 
 
+@pytest.mark.asyncio
+async def test_jwt_bearer_loads_public_key_without_blocking():
+    """Test JWTBearer loads a not yet loaded public key with the async loader."""
+    # Arrange
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {encoded_token}"}
+
+    async def update_public_key_async():
+        config.public_key = TESTING_PUBLIC_KEY
+
+    # Act
+    with mock.patch.object(config, "_public_key_loaded", False), mock.patch.object(
+        config, "update_public_key"
+    ) as mock_update, mock.patch.object(
+        config, "update_public_key_async", side_effect=update_public_key_async
+    ) as mock_update_async:
+        decoded_jwt = await JWTBearer()(request)
+
+    # Assert
+    mock_update.assert_not_called()
+    mock_update_async.assert_awaited_once()
+    assert decoded_jwt["email"] == DECODED_MOCK_JWT["email"]
+
+
+def test_get_issuer_verifier():
+    # Arrange
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    internal_token = jwt.encode({"iss": "internal"}, "shared-secret", algorithm="HS256")
+    default_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT})
+
+    # Act / Assert
+    with mock.patch.object(config, "verifiers", {"internal": verifier}):
+        assert get_issuer_verifier(internal_token) is verifier
+        assert get_issuer_verifier(default_token) is None
+        assert get_issuer_verifier("malformed") is None
+    assert get_issuer_verifier(internal_token) is None
+
+
+@pytest.mark.asyncio
+async def test_jwt_bearer_internal_issuer_ok():
+    """Test JWTBearer with a token of an issuer with its own verifier."""
+    # Arrange
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    encoded_token = jwt.encode(
+        {**DECODED_MOCK_JWT, "iss": "internal", "exp": current_timestamp() + 60},
+        "shared-secret",
+        algorithm="HS256",
+    )
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {encoded_token}"}
+
+    # Act
+    with mock.patch.object(config, "verifiers", {"internal": verifier}):
+        decoded_jwt = await JWTBearer()(request)
+
+    # Assert
+    assert decoded_jwt["iss"] == "internal"
+
+
+@pytest.mark.asyncio
+async def test_jwt_bearer_internal_issuer_wrong_key():
+    """Test JWTBearer rejects a token of an issuer signed with another issuer's key."""
+    # Arrange
+    verifier = Verifier("internal", "shared-secret", "HS256")
+    encoded_token = get_encoded_mock_jwt({**DECODED_MOCK_JWT, "iss": "internal"})
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {encoded_token}"}
+
+    # Act
+    with mock.patch.object(config, "verifiers", {"internal": verifier}):
+        with pytest.raises(HTTPException) as exc:
+            await JWTBearer()(request)
+
+    # Assert
+    assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_jwt_bearer_metrics():
+    """Test JWTBearerAdmin records stage latencies and failure reasons."""
+    # Arrange
+    sink = PrometheusMetricsSink()
+    user_request = MagicMock()
+    user_request.headers = {"Authorization": f"Bearer {get_encoded_mock_jwt({**DECODED_MOCK_JWT})}"}
+    admin_request = MagicMock()
+    admin_request.headers = {
+        "Authorization": f"Bearer {get_encoded_mock_jwt({**DECODED_ADMIN_MOCK_JWT})}"
+    }
+    invalid_request = MagicMock()
+    invalid_request.headers = {"Authorization": "Bearer malformed"}
+
+    # Act
+    with mock.patch.object(config, "metrics_sink", sink):
+        await JWTBearerAdmin()(admin_request)
+        with pytest.raises(HTTPException):
+            await JWTBearerAdmin()(user_request)
+        with pytest.raises(HTTPException):
+            await JWTBearerAdmin()(invalid_request)
+    text = sink.render()
+
+    # Assert
+    for stage in ["header", "key"]:
+        assert f'jwt_auth_stage_seconds_count{{stage="{stage}"}} 3' in text
+    for stage in ["signature", "issuer"]:
+        assert f'jwt_auth_stage_seconds_count{{stage="{stage}"}} 2' in text
+    assert 'jwt_auth_stage_seconds_count{stage="role"} 1' in text
+    assert 'jwt_auth_failures_total{reason="forbidden"} 1' in text
+    assert 'jwt_auth_failures_total{reason="invalid_token"} 1' in text
+
+
 @pytest.mark.asyncio
 @mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
 async def test_jwt_bearer_admin_ok(mock_validate_and_decode_token):
     """Test JWTBearerAdmin with a valid token."""
     # Arrange
-    mock_validate_and_decode_token.return_value = DECODED_ADMIN_MOCK_JWT
+    encoded_token = get_encoded_mock_jwt(DECODED_ADMIN_MOCK_JWT)
+    mock_validate_and_decode_token.return_value = jwt.decode(
+        encoded_token, options={"verify_signature": False}
+    )
     jwt_bearer_admin = JWTBearerAdmin()
     request = MagicMock()
-    encoded_token = get_encoded_mock_jwt(DECODED_ADMIN_MOCK_JWT)
     request.headers = {"Authorization": f"Bearer {encoded_token}"}
     decoded_jwt = await jwt_bearer_admin(request)
     assert_token_validation_called(mock_validate_and_decode_token, encoded_token)
@@ -136,3 +510,214 @@ async def test_jwt_bearer_admin_error_no_admin_role(mock_validate_and_decode_tok
     assert exc.value.detail == "Only admins can perform this action"
     assert exc.value.status_code == status.HTTP_403_FORBIDDEN
     assert_token_validation_called(mock_validate_and_decode_token, encoded_token)
+
+
+@pytest.mark.asyncio
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
+async def test_jwt_bearer_as_claims(mock_validate_and_decode_token):
+    # Arrange
+    mock_validate_and_decode_token.return_value = DECODED_ADMIN_MOCK_JWT
+    jwt_bearer_admin = JWTBearerAdmin(as_claims=True)
+    request = MagicMock()
+    encoded_token = get_encoded_mock_jwt(DECODED_ADMIN_MOCK_JWT)
+    request.headers = {"Authorization": f"Bearer {encoded_token}"}
+
+    # Act
+    claims = await jwt_bearer_admin(request)
+
+    # Assert
+    assert isinstance(claims, Claims)
+    assert claims.has_role("ADMIN")
+    assert claims.email == DECODED_ADMIN_MOCK_JWT["email"]
+
+
+# Request memoization #############################################################################
+def test_get_request_jwt_other_token():
+    # Arrange
+    request = MagicMock()
+    set_request_jwt(request, "token", DECODED_MOCK_JWT)
+
+    # Act
+    same_token = get_request_jwt(request, "token")
+    other_token = get_request_jwt(request, "other-token")
+
+    # Assert
+    assert same_token == DECODED_MOCK_JWT
+    assert other_token is None
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
+def test_jwt_bearers_decode_once_per_request(mock_validate_and_decode_token):
+    # Arrange
+    mock_validate_and_decode_token.return_value = DECODED_ADMIN_MOCK_JWT
+    app = FastAPI()
+
+    def get_email(decoded_jwt: dict = Depends(JWTBearer())):
+        return decoded_jwt["email"]
+
+    @app.get("/admin")
+    def admin(
+        email: str = Depends(get_email),
+        admin_jwt: dict = Depends(JWTBearerAdmin()),
+    ):
+        return {"email": email}
+
+    client = TestClient(app)
+    encoded_token = get_encoded_mock_jwt(DECODED_ADMIN_MOCK_JWT)
+    headers = {"Authorization": f"Bearer {encoded_token}"}
+
+    # Act
+    first = client.get("/admin", headers=headers)
+    second = client.get("/admin", headers=headers)
+
+    # Assert
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert mock_validate_and_decode_token.call_count == 2
+
+
+# require_roles ###################################################################################
+@pytest.mark.parametrize(
+    "any_of, all_of, expected",
+    [
+        ((), (), True),
+        (("ADMIN", "EDITOR"), (), True),
+        (("EDITOR",), (), False),
+        ((), ("ADMIN", "USER"), True),
+        ((), ("ADMIN", "EDITOR"), False),
+        (("ADMIN",), ("EDITOR",), False),
+    ],
+)
+def test_has_roles(any_of, all_of, expected):
+    decoded_jwt = {"roles": ["ADMIN", "USER"]}
+    assert has_roles(decoded_jwt, frozenset(any_of), frozenset(all_of)) == expected
+
+
+def test_has_roles_single_role_string():
+    assert has_roles({"roles": "ADMIN"}, all_of=frozenset({"ADMIN"}))
+    assert not has_roles({"roles": "ADMIN"}, any_of=frozenset({"A", "D"}))
+
+
+def test_has_roles_without_roles_claim():
+    assert has_roles({}, all_of=frozenset())
+    assert not has_roles({}, any_of=frozenset({"ADMIN"}))
+
+
+def get_roles_app():
+    app = FastAPI()
+
+    @app.get("/admin")
+    def admin(
+        decoded_jwt: dict = Depends(jwt_bearer),
+        admin_jwt: dict = Depends(require_roles(any_of=["ADMIN"])),
+    ):
+        return {"email": admin_jwt["email"]}
+
+    @app.get("/own")
+    def own(
+        decoded_jwt: dict = Depends(
+            require_roles(predicate=lambda claims: claims["email"].endswith("@example.com"))
+        ),
+    ):
+        return {"email": decoded_jwt["email"]}
+
+    return app
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
+def test_require_roles_ok(mock_validate_and_decode_token):
+    # Arrange
+    mock_validate_and_decode_token.return_value = DECODED_ADMIN_MOCK_JWT
+    client = TestClient(get_roles_app())
+    encoded_token = get_encoded_mock_jwt(DECODED_ADMIN_MOCK_JWT)
+
+    # Act
+    response = client.get("/admin", headers={"Authorization": f"Bearer {encoded_token}"})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"email": DECODED_ADMIN_MOCK_JWT["email"]}
+    mock_validate_and_decode_token.assert_called_once()
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
+def test_require_roles_forbidden(mock_validate_and_decode_token):
+    # Arrange
+    mock_validate_and_decode_token.return_value = DECODED_MOCK_JWT
+    client = TestClient(get_roles_app())
+    encoded_token = get_encoded_mock_jwt(DECODED_MOCK_JWT)
+
+    # Act
+    response = client.get("/admin", headers={"Authorization": f"Bearer {encoded_token}"})
+
+    # Assert
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@mock.patch("mumichaspy.fastapi_jwt_chassis.validation.validate_and_decode_token")
+def test_require_roles_predicate(mock_validate_and_decode_token):
+    # Arrange
+    mock_validate_and_decode_token.return_value = {**DECODED_MOCK_JWT, "email": "a@example.com"}
+    client = TestClient(get_roles_app())
+    encoded_token = get_encoded_mock_jwt(DECODED_MOCK_JWT)
+
+    # Act
+    allowed = client.get("/own", headers={"Authorization": f"Bearer {encoded_token}"})
+    mock_validate_and_decode_token.return_value = {**DECODED_MOCK_JWT, "email": "a@other.com"}
+    forbidden = client.get("/own", headers={"Authorization": f"Bearer {encoded_token}"})
+
+    # Assert
+    assert allowed.status_code == status.HTTP_200_OK
+    assert forbidden.status_code == status.HTTP_403_FORBIDDEN
+
+
+# raise_and_log_error #############################################################################
+def test_log_rate_limiter():
+    # Arrange
+    clock = FrozenClock(1000.0)
+    limiter = LogRateLimiter(interval=1, clock=clock)
+
+    # Act
+    first = limiter.allow("key")
+    second = limiter.allow("key")
+    third = limiter.allow("key")
+    other = limiter.allow("other")
+    clock.advance(1)
+    fourth = limiter.allow("key")
+
+    # Assert
+    assert first == (True, 0)
+    assert second == (False, 0)
+    assert third == (False, 0)
+    assert other == (True, 0)
+    assert fourth == (True, 2)
+
+
+def test_log_rate_limiter_disabled():
+    limiter = LogRateLimiter(interval=0)
+    assert limiter.allow("key") == (True, 0)
+    assert limiter.allow("key") == (True, 0)
+
+
+def test_raise_and_log_error_rate_limited():
+    # Arrange
+    my_logger = MagicMock()
+    my_logger.name = "test"
+    clock = FrozenClock(1000.0)
+    limiter = LogRateLimiter(interval=1, clock=clock)
+
+    # Act
+    with mock.patch("mumichaspy.fastapi_jwt_chassis.validation.log_rate_limiter", limiter):
+        for i in range(3):
+            with pytest.raises(HTTPException) as exc:
+                raise_and_log_error(my_logger, 401, "Could not decode JWT", f"error {i}")
+            assert exc.value.status_code == 401
+        clock.advance(1)
+        with pytest.raises(HTTPException):
+            raise_and_log_error(my_logger, 401, "Could not decode JWT", "error 3")
+
+    # Assert
+    assert my_logger.error.call_args_list == [
+        mock.call("error 0"),
+        mock.call("error 3 (2 similar errors suppressed)"),
+    ]
@@ -4,6 +4,7 @@
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from mumichaspy.sqlalchemy_chassis.crud import create_elements
 from mumichaspy.sqlalchemy_chassis.testing_helpers import get_unique_memory_db
 
 from .models import EntityForTesting
@@ -40,14 +41,12 @@ async def get_testing_db(empty: bool = True):
 
 async def insert_entities(db):
     """Insert entities from dict array into database."""
-    for entity in entities:
-        new_entity = EntityForTesting(
-            name=entity["name"], description=entity["description"]
-        )
-        db.add(new_entity)
-        await db.commit()
-        await db.refresh(new_entity)
-        assert entity["id"] == new_entity.id
+    rows = [
+        {"name": entity["name"], "description": entity["description"]}
+        for entity in entities
+    ]
+    ids = await create_elements(db, EntityForTesting, rows, return_ids=True)
+    assert ids == get_entity_ids()
 
 
 def get_entity_ids():
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """Tests for crud helper functions."""
 
+from unittest import mock
+
 import pytest
 
 from sqlalchemy.future import select
@@ -10,7 +12,11 @@ from mumichaspy.sqlalchemy_chassis.crud import (
     get_first_statement_result,
     get_list,
     delete_element_by_id,
+    delete_elements,
     create_element,
+    create_elements,
+    update_elements,
+    upsert_elements,
 )
 
 from .helpers import get_testing_db, get_entity_ids, N_OF_ENTITIES, entities
@@ -175,6 +181,52 @@ async def test_delete_element_by_id_ok():
         assert element is None
 
 
+@pytest.mark.asyncio
+async def test_delete_element_by_id_not_materialized_ok():
+    """Test that delete_element_by_id without materialize returns the id of the deleted row."""
+    async with get_testing_db(empty=False) as db:
+        delete_id = get_entity_ids()[0]
+        deleted_id = await delete_element_by_id(
+            db, EntityForTesting, delete_id, materialize=False
+        )
+        missing_id = await delete_element_by_id(
+            db, EntityForTesting, delete_id, materialize=False
+        )
+        assert deleted_id == delete_id
+        assert missing_id is None
+        assert await get_element_by_id(db, EntityForTesting, delete_id) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_elements_ids_ok():
+    """Test that delete_elements deletes the given ids and returns them."""
+    async with get_testing_db(empty=False) as db:
+        delete_ids = get_entity_ids()[:3]
+        deleted_ids = await delete_elements(
+            db, EntityForTesting, ids=delete_ids, return_ids=True, chunk_size=2
+        )
+        elements = await get_list(db, EntityForTesting)
+        assert sorted(deleted_ids) == sorted(delete_ids)
+        assert len(elements) == N_OF_ENTITIES - 3
+
+
+@pytest.mark.asyncio
+async def test_delete_elements_filters_ok():
+    """Test that delete_elements deletes the rows matching filters and returns their count."""
+    async with get_testing_db(empty=False) as db:
+        count = await delete_elements(db, EntityForTesting, filters={"name": entities[0]["name"]})
+        assert count == 1
+        assert await get_element_by_id(db, EntityForTesting, entities[0]["id"]) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_elements_error_no_criteria():
+    """Test that delete_elements requires filters or ids."""
+    async with get_testing_db(empty=False) as db:
+        with pytest.raises(ValueError):
+            await delete_elements(db, EntityForTesting)
+
+
 @pytest.mark.asyncio
 async def test_get_first_statement_result_ok():
     """Test that get_first_statement_result returns the first element."""
@@ -201,4 +253,101 @@ async def test_create_element_ok():
         assert db_element.description == element_dict["description"]
 
 
+@pytest.mark.asyncio
+async def test_create_elements_ok():
+    """Test that create_elements inserts every row in chunks."""
+    async with get_testing_db() as db:
+        rows = [{"name": f"Name {i}", "description": "Bulk"} for i in range(25)]
+        count = await create_elements(db, EntityForTesting, rows, chunk_size=10)
+        elements = await get_list(db, EntityForTesting, order_by="id")
+        assert count == 25
+        assert [element.name for element in elements] == [row["name"] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_create_elements_return_ids_ok():
+    """Test that create_elements returns generated primary keys in order."""
+    async with get_testing_db() as db:
+        rows = [{"name": f"Name {i}", "description": "Bulk"} for i in range(5)]
+        ids = await create_elements(db, EntityForTesting, rows, chunk_size=2, return_ids=True)
+        assert ids == [1, 2, 3, 4, 5]
+        element = await get_element_by_id(db, EntityForTesting, ids[3])
+        assert element.name == "Name 3"
+
+
+@pytest.mark.asyncio
+async def test_create_elements_error():
+    """Test that create_elements returns None and rolls back a failing chunk."""
+    async with get_testing_db() as db:
+        rows = [{"id": 1, "name": "First"}, {"id": 1, "name": "Duplicated"}]
+        result = await create_elements(db, EntityForTesting, rows)
+        elements = await get_list(db, EntityForTesting)
+        assert result is None
+        assert len(elements) == 0
+
+
+@pytest.mark.asyncio
+async def test_update_elements_ok():
+    """Test that update_elements updates matching rows and returns their count."""
+    async with get_testing_db(empty=False) as db:
+        count = await update_elements(
+            db, EntityForTesting, {"name": entities[0]["name"]}, {"description": "Updated"}
+        )
+        updated = await get_list(db, EntityForTesting, filters={"description": "Updated"})
+        assert count == 1
+        assert [element.id for element in updated] == [entities[0]["id"]]
+
+
+@pytest.mark.asyncio
+async def test_update_elements_all_rows_ok():
+    """Test that update_elements without filters updates every row."""
+    async with get_testing_db(empty=False) as db:
+        count = await update_elements(db, EntityForTesting, {}, {"description": "Updated"})
+        assert count == N_OF_ENTITIES
+
+
+@pytest.mark.asyncio
+async def test_update_elements_error_unknown_column():
+    """Test that update_elements does not ignore unknown filter columns."""
+    async with get_testing_db(empty=False) as db:
+        with pytest.raises(ValueError):
+            await update_elements(db, EntityForTesting, {"unknown": 1}, {"name": "Updated"})
+
+
+@pytest.mark.asyncio
+async def test_upsert_elements_ok():
+    """Test that upsert_elements inserts new rows and updates existing ones."""
+    async with get_testing_db(empty=False) as db:
+        rows = [
+            {"id": 1, "name": "Updated", "description": "Updated"},
+            {"id": N_OF_ENTITIES + 1, "name": "New", "description": "New"},
+        ]
+        count = await upsert_elements(db, EntityForTesting, rows, chunk_size=1)
+        elements = await get_list(db, EntityForTesting, order_by="id")
+        assert count == 2
+        assert len(elements) == N_OF_ENTITIES + 1
+        assert (elements[0].name, elements[-1].name) == ("Updated", "New")
+
+
+@pytest.mark.asyncio
+async def test_upsert_elements_do_nothing_ok():
+    """Test that upsert_elements keeps existing rows when there is nothing to update."""
+    async with get_testing_db(empty=False) as db:
+        rows = [{"id": 1}, {"id": N_OF_ENTITIES + 1}]
+        count = await upsert_elements(db, EntityForTesting, rows)
+        element = await get_element_by_id(db, EntityForTesting, 1)
+        assert count == 1
+        assert element.name == entities[0]["name"]
+
+
+@pytest.mark.asyncio
+async def test_upsert_elements_error_unsupported_dialect():
+    """Test that upsert_elements raises ValueError for dialects without ON CONFLICT."""
+    async with get_testing_db() as db:
+        with mock.patch.dict(
+            "mumichaspy.sqlalchemy_chassis.crud.UPSERT_INSERTS", clear=True
+        ), pytest.raises(ValueError):
+            await upsert_elements(db, EntityForTesting, [{"id": 1}])
+
+
 # @ToDo: Test with filters
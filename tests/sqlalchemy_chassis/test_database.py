@@ -1,9 +1,17 @@
 import os
+import subprocess
+import sys
+from unittest import mock
+
 import pytest
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from mumichaspy.sqlalchemy_chassis import database
+from mumichaspy.sqlalchemy_chassis.config import Config, config, get_optional_env
 from mumichaspy.sqlalchemy_chassis.database import get_db
+from mumichaspy.sqlalchemy_chassis.pool import PoolMonitor
 
 
 @pytest.mark.asyncio
@@ -39,3 +47,118 @@ async def test_get_db():
 
     # Remove the database file
     os.remove(db_file)
+
+
+def test_import_does_not_create_engine():
+    """Test that importing the module does not create the engine."""
+    code = (
+        "from mumichaspy.sqlalchemy_chassis import database;"
+        "assert database._engine is None;"
+        "assert database._session_local is None"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_init():
+    """Test that init replaces engine and session factory."""
+    # Arrange
+    previous_engine = database.get_engine()
+
+    # Act
+    engine = database.init("sqlite+aiosqlite:///:memory:", echo=False)
+
+    # Assert
+    assert engine is not previous_engine
+    assert database.engine is engine
+    assert database.SessionLocal.kw["bind"] is engine
+    assert engine.url.database == ":memory:"
+    assert engine.echo is False
+
+    # Restore default engine
+    database.init()
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        database.unknown_attribute
+
+
+# Pool ############################################################################################
+def test_get_engine_options():
+    # Arrange
+    test_config = Config()
+    test_config.SQLALCHEMY_POOL_SIZE = 2
+    test_config.SQLALCHEMY_POOL_PRE_PING = True
+
+    # Act
+    options = test_config.get_engine_options()
+
+    # Assert
+    assert options == {"pool_size": 2, "pool_pre_ping": True}
+
+
+def test_get_optional_env():
+    with mock.patch.dict(os.environ, {"A": "3", "B": "true", "C": ""}):
+        assert get_optional_env("A", int) == 3
+        assert get_optional_env("B", bool) is True
+        assert get_optional_env("C", int) is None
+        assert get_optional_env("MISSING", int) is None
+
+
+def test_create_engine_pool_settings(tmp_path):
+    # Arrange
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+
+    # Act
+    with mock.patch.object(config, "SQLALCHEMY_POOL_SIZE", 3), mock.patch.object(
+        config, "SQLALCHEMY_POOL_TIMEOUT", 1.5
+    ):
+        engine = database.create_engine(database_url, echo=False)
+
+    # Assert
+    assert engine.pool.size() == 3
+    assert engine.pool.timeout() == 1.5
+    assert engine.echo is False
+
+
+@pytest.mark.asyncio
+async def test_pool_monitor(tmp_path):
+    # Arrange
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    engine = database.create_engine(
+        database_url, echo=False, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+    monitor = PoolMonitor(engine)
+
+    # Act
+    async with engine.connect():
+        busy_stats = monitor.stats()
+        with pytest.raises(TimeoutError):
+            async with engine.connect():
+                pass
+    await engine.dispose()
+    async with engine.connect():
+        pass
+    stats = monitor.stats()
+
+    # Assert
+    assert busy_stats["saturation"] == 1.0
+    assert busy_stats["checked_out"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0
+    assert stats["peak_checked_out"] == 1
+    assert stats["saturation"] == 0.0
+
+
+def test_get_pool_stats():
+    # Act
+    with mock.patch.object(config, "SQLALCHEMY_POOL_MONITOR", True):
+        database.init(echo=False)
+    stats = database.get_pool_stats()
+    with mock.patch.object(config, "SQLALCHEMY_POOL_MONITOR", False):
+        database.init()
+
+    # Assert
+    assert stats["checkouts"] == 0
+    assert database.get_pool_stats() is None
@@ -0,0 +1,113 @@
+import logging
+from unittest import mock
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from mumichaspy.sqlalchemy_chassis import database
+from mumichaspy.sqlalchemy_chassis.config import config
+from mumichaspy.sqlalchemy_chassis.profiler import QueryProfiler, fingerprint_statement
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("SELECT * FROM users WHERE id = 1", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE name = 'O''Brien'", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT *\n  FROM users WHERE id = ?", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE id = :id_1", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM t1 WHERE id IN (?, ?, ?)", "SELECT * FROM t1 WHERE id IN (...)"),
+        ("INSERT INTO t (a, b) VALUES (%(a)s, %(b)s)", "INSERT INTO t (a, b) VALUES (...)"),
+    ],
+)
+def test_fingerprint_statement(statement, expected):
+    assert fingerprint_statement(statement) == expected
+
+
+def test_query_profiler_record(caplog):
+    # Arrange
+    profiler = QueryProfiler(database.create_engine("sqlite+aiosqlite:///:memory:"), 0.5)
+
+    # Act
+    with caplog.at_level(logging.WARNING):
+        profiler.record("SELECT 1", 0.1)
+        profiler.record("SELECT 2", 0.3)
+        profiler.record("SELECT * FROM t", 1.0)
+    aggregates = profiler.dump()
+
+    # Assert
+    assert aggregates[0]["fingerprint"] == "SELECT * FROM t"
+    assert aggregates[1] == {
+        "fingerprint": "SELECT ?",
+        "count": 2,
+        "total_seconds": pytest.approx(0.4),
+        "avg_seconds": pytest.approx(0.2),
+        "max_seconds": 0.3,
+    }
+    assert len(caplog.records) == 1
+    assert caplog.records[0].fingerprint == "SELECT * FROM t"
+    assert caplog.records[0].duration == 1.0
+
+
+def test_query_profiler_max_fingerprints():
+    # Arrange
+    profiler = QueryProfiler(
+        database.create_engine("sqlite+aiosqlite:///:memory:"), max_fingerprints=1
+    )
+
+    # Act
+    profiler.record("SELECT 1 FROM a", 0.1)
+    profiler.record("SELECT 1 FROM b", 0.1)
+    profiler.record("SELECT 1 FROM c", 0.1)
+
+    # Assert
+    assert {aggregate["fingerprint"]: aggregate["count"] for aggregate in profiler.dump()} == {
+        "SELECT ? FROM a": 1,
+        "(other)": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_query_profiler_engine_events():
+    # Arrange
+    engine = database.create_engine("sqlite+aiosqlite:///:memory:")
+    profiler = QueryProfiler(engine)
+
+    # Act
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        await connection.execute(text("SELECT :value"), {"value": 2})
+        with pytest.raises(OperationalError):
+            await connection.execute(text("SELECT * FROM missing_table"))
+        start_times = (await connection.get_raw_connection()).info.get("query_start_times")
+    aggregates = profiler.dump()
+    profiler.detach()
+    profiler.reset()
+
+    # Assert
+    assert [aggregate["count"] for aggregate in aggregates] == [2]
+    assert not start_times
+    assert profiler.dump() == []
+    await engine.dispose()
+
+
+def test_echo_off_by_default():
+    assert database.create_engine("sqlite+aiosqlite:///:memory:").echo is False
+
+
+@pytest.mark.asyncio
+async def test_get_query_stats():
+    # Arrange
+    with mock.patch.object(config, "SQLALCHEMY_PROFILE_QUERIES", True):
+        database.init("sqlite+aiosqlite:///:memory:")
+
+    # Act
+    async for db in database.get_db():
+        await db.execute(text("SELECT 1"))
+    stats = database.get_query_stats()
+    database.init()
+
+    # Assert
+    assert [aggregate["fingerprint"] for aggregate in stats] == ["SELECT ?"]
+    assert database.get_query_stats() is None